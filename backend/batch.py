@@ -0,0 +1,90 @@
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from models import NestingRequest, NestingResponse
+from nesting_service import NestingService
+from profiling import get_metrics
+from result_cache import canonical_request_key, get_result_cache
+
+class BatchExecutor:
+    """Ejecuta lotes de solicitudes de nesting en un pool de procesos.
+    
+    El pool se crea una sola vez y sus procesos se reutilizan entre lotes:
+    cada uno conserva sus caches de NFP, plantillas y perfiles, así las
+    solicitudes que repiten piezas no vuelven a pagar esa preparación.
+    Dentro de un lote, las solicitudes equivalentes se resuelven una sola
+    vez y las que ya están en el cache de resultados no se envían al pool.
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None, max_batch: int = 500):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.executor = None
+        self.lock = threading.Lock()
+    
+    def submit(self, requests: List[NestingRequest]) -> List[Tuple[List[int], Future]]:
+        """Encola un lote y retorna (índices de las solicitudes, future) por tarea.
+        
+        Cada future resuelve a la NestingResponse compartida por esos índices.
+        """
+        if len(requests) > self.max_batch:
+            raise ValueError(f"El lote supera el máximo de {self.max_batch} solicitudes")
+        
+        result_cache = get_result_cache()
+        tasks = []
+        pending = {}  # clave canónica -> tarea, para no repetir solicitudes equivalentes
+        for index, request in enumerate(requests):
+            key = canonical_request_key(request)[0] if request.use_cache else None
+            if key is not None and key in pending:
+                pending[key][0].append(index)
+                continue
+            
+            cached = result_cache.get(request) if request.use_cache else None
+            if cached is not None:
+                future = Future()
+                future.set_result(cached.model_copy(update={'cache_hit': True, 'computation_time': 0.0}))
+            else:
+                # El cache de resultados es el del proceso principal, no el de los workers
+                future = self._pool().submit(_solve_in_worker, request.model_copy(update={'use_cache': False}))
+                future.add_done_callback(lambda done, request=request: _record_result(request, done))
+            
+            task = ([index], future)
+            tasks.append(task)
+            if key is not None:
+                pending[key] = task
+        return tasks
+    
+    def shutdown(self):
+        """Detiene el pool descartando las tareas que no empezaron"""
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+    
+    def _pool(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self.executor
+
+def _solve_in_worker(request: NestingRequest) -> NestingResponse:
+    """Resuelve una solicitud dentro de un proceso del pool"""
+    return NestingService().process_nesting_request(request)
+
+def _record_result(request: NestingRequest, future: Future):
+    """Registra en el proceso principal el resultado de un worker (métricas y cache)"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    response = future.result()
+    get_metrics().observe_solve(request.algorithm, response.computation_time, response.stop_reason)
+    if request.use_cache:
+        get_result_cache().put(request, response.model_copy(update={'profile': None}))
+
+def create_batch_executor() -> BatchExecutor:
+    """Crea el BatchExecutor usando la configuración del entorno"""
+    workers = int(os.environ.get("NESTING_BATCH_WORKERS", 0))
+    return BatchExecutor(
+        max_workers=workers or None,
+        max_batch=int(os.environ.get("NESTING_MAX_BATCH", 500))
+    )
@@ -0,0 +1 @@
+"""Suite de benchmarks del motor de nesting (ver benchmarks.runner)"""
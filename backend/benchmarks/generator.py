@@ -0,0 +1,100 @@
+"""Generador reproducible de instancias de nesting para benchmarks.
+
+Uso:
+    python -m benchmarks.generator mixed 200 --seed 1 > instancia.json
+"""
+import argparse
+import json
+import math
+import random
+import sys
+from typing import Dict, List, Tuple
+
+KINDS = ("irregular", "rectilinear", "mixed")
+
+# Tamaño del bin de las instancias generadas
+BIN_WIDTH = 1000.0
+BIN_HEIGHT = 600.0
+
+# Piezas (en área) que entran aproximadamente en un bin
+PIECES_PER_BIN = 40
+
+def _rectilinear_shape(rng: random.Random) -> List[Tuple[float, float]]:
+    """Rectángulo, L, T o U de proporciones aleatorias (unidad ~1)"""
+    w, h = rng.uniform(0.5, 1.5), rng.uniform(0.5, 1.5)
+    a, b = rng.uniform(0.3, 0.7), rng.uniform(0.3, 0.7)
+    shape = rng.choice(("rect", "L", "T", "U"))
+    if shape == "rect":
+        return [(0, 0), (w, 0), (w, h), (0, h)]
+    if shape == "L":
+        return [(0, 0), (w, 0), (w, h * b), (w * a, h * b), (w * a, h), (0, h)]
+    if shape == "T":
+        left, right = w * (1 - a) / 2, w * (1 + a) / 2
+        return [(left, 0), (right, 0), (right, h * b), (w, h * b), (w, h), (0, h), (0, h * b), (left, h * b)]
+    left, right = w * a / 3, w * (1 - a / 3)
+    return [(0, 0), (w, 0), (w, h), (right, h), (right, h * b), (left, h * b), (left, h), (0, h)]
+
+def _irregular_shape(rng: random.Random) -> List[Tuple[float, float]]:
+    """Polígono estrellado no convexo de 5 a 12 vértices (unidad ~1)"""
+    vertices = rng.randint(5, 12)
+    # Un ángulo por sector: ningún hueco supera media vuelta, así el polígono es simple
+    angles = [2 * math.pi * (k + rng.uniform(0.1, 0.9)) / vertices for k in range(vertices)]
+    radii = [0.5 * rng.uniform(0.45, 1.0) for _ in angles]
+    aspect = rng.uniform(0.6, 1.6)
+    return [(radius * math.cos(angle) * aspect, radius * math.sin(angle))
+            for angle, radius in zip(angles, radii)]
+
+def _area(points: List[Tuple[float, float]]) -> float:
+    return abs(sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]))) / 2
+
+def generate_instance(kind: str, pieces: int, seed: int = 0, distinct: int = 50,
+                      algorithm: str = "bottom_left") -> Dict:
+    """Genera una solicitud de nesting (dict compatible con NestingRequest).
+    
+    ``pieces`` es la cantidad total de unidades; se reparten entre hasta
+    ``distinct`` formas distintas mediante ``quantity``. Las piezas se
+    escalan para que unas ``PIECES_PER_BIN`` ocupen un bin, así las
+    instancias grandes usan más bins y no piezas más chicas.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Tipo de instancia desconocido: {kind}")
+    rng = random.Random(f"{kind}-{pieces}-{seed}")
+    shapes = min(pieces, distinct)
+    quantities = [pieces // shapes + (1 if i < pieces % shapes else 0) for i in range(shapes)]
+    
+    outlines = []
+    for _ in range(shapes):
+        irregular = kind == "irregular" or (kind == "mixed" and rng.random() < 0.5)
+        outlines.append(_irregular_shape(rng) if irregular else _rectilinear_shape(rng))
+    
+    # Escala común: el área promedio de una unidad es 0.6 bin / PIECES_PER_BIN
+    mean_area = sum(_area(o) * q for o, q in zip(outlines, quantities)) / pieces
+    scale = math.sqrt(0.6 * BIN_WIDTH * BIN_HEIGHT / PIECES_PER_BIN / mean_area)
+    
+    return {
+        "name": f"{kind}-{pieces}-s{seed}",
+        "pieces": [
+            {
+                "id": f"{kind[0]}{i}",
+                "points": [{"x": round(x * scale, 4), "y": round(y * scale, 4)} for x, y in outline],
+                "quantity": quantity
+            }
+            for i, (outline, quantity) in enumerate(zip(outlines, quantities))
+        ],
+        "bin_width": BIN_WIDTH,
+        "bin_height": BIN_HEIGHT,
+        "algorithm": algorithm,
+        "rotation_step": 90.0
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera una instancia de nesting reproducible")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("pieces", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--distinct", type=int, default=50)
+    args = parser.parse_args(argv)
+    json.dump(generate_instance(args.kind, args.pieces, args.seed, args.distinct), sys.stdout, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Runner de benchmarks del motor de nesting.
+
+Cada corrida (instancia × algoritmo) se ejecuta en un proceso nuevo para
+medir la memoria pico sin interferencias y sin caches calientes. Se
+registran tiempo, memoria pico, llamadas a ``can_place_piece``, bins y
+utilización, en JSON.
+
+Uso (desde ``backend/``):
+    python -m benchmarks.runner run --suite quick --output resultados.json
+    python -m benchmarks.runner compare base.json resultados.json --threshold 0.15
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from benchmarks.generator import generate_instance
+
+SHAPES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "shapes")
+
+# Instancias generadas por suite: (tipo, piezas, semilla)
+SUITES = {
+    "quick": [("rectilinear", 10, 1), ("irregular", 50, 1), ("mixed", 100, 1)],
+    "standard": [("rectilinear", 100, 1), ("irregular", 250, 1), ("mixed", 500, 1)],
+    "full": [("rectilinear", 1000, 1), ("irregular", 1000, 1), ("mixed", 2500, 1), ("mixed", 5000, 1)]
+}
+
+DEFAULT_ALGORITHMS = ["bottom_left", "best_fit", "raster", "nfp"]
+
+# Presupuesto por corrida de los algoritmos iterativos
+ITERATIVE_ALGORITHMS = {"genetic", "annealing"}
+ITERATIVE_TIME_LIMIT_MS = 10000
+
+def load_instances(suite: str, include_shapes: bool = True) -> List[Dict]:
+    """Instancias de una suite: generadas con semilla y conjuntos locales de formas"""
+    instances = [generate_instance(kind, pieces, seed) for kind, pieces, seed in SUITES[suite]]
+    if include_shapes:
+        for path in sorted(glob.glob(os.path.join(SHAPES_DIR, "*.json"))):
+            with open(path) as f:
+                instances.append(json.load(f))
+    return instances
+
+def run_case(instance: Dict, algorithm: str, seed: int = 0) -> Dict:
+    """Ejecuta una instancia con un algoritmo y retorna sus métricas.
+    
+    Se llama en un proceso dedicado: cuenta las llamadas a
+    ``can_place_piece`` envolviendo el método de la clase.
+    """
+    from models import NestingRequest
+    from nesting_engine import NestingEngine
+    from nesting_service import NestingService
+    
+    calls = [0]
+    can_place_piece = NestingEngine.can_place_piece
+    
+    def counted(self, *args, **kwargs):
+        calls[0] += 1
+        return can_place_piece(self, *args, **kwargs)
+    
+    NestingEngine.can_place_piece = counted
+    
+    data = dict(instance, algorithm=algorithm, use_cache=False, response_format="compact", seed=seed)
+    if algorithm in ITERATIVE_ALGORITHMS:
+        data.setdefault("time_limit_ms", ITERATIVE_TIME_LIMIT_MS)
+    request = NestingRequest(**data)
+    pieces = sum(piece.quantity for piece in request.pieces)
+    
+    started = time.perf_counter()
+    response = NestingService().process_nesting_request(request)
+    elapsed = time.perf_counter() - started
+    
+    # ru_maxrss está en KiB en Linux y en bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    
+    return {
+        "instance": instance.get("name", "sin_nombre"),
+        "algorithm": algorithm,
+        "pieces": pieces,
+        "wall_time_s": round(elapsed, 4),
+        "pieces_per_s": round(pieces / elapsed, 3) if elapsed > 0 else None,
+        "peak_memory_mb": round(peak_mb, 1),
+        "can_place_piece_calls": calls[0],
+        "bins_used": response.bins_used,
+        "utilization": round(response.utilization, 3),
+        "unplaced": len(response.unplaced_pieces),
+        "stop_reason": response.stop_reason
+    }
+
+def run_suite(instances: List[Dict], algorithms: List[str], seed: int = 0,
+              log=sys.stderr) -> Dict:
+    """Ejecuta todas las combinaciones, cada una en un proceso nuevo"""
+    results = []
+    for instance in instances:
+        for algorithm in algorithms:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(run_case, instance, algorithm, seed).result()
+            results.append(result)
+            print(f"{result['instance']:<28} {algorithm:<12} {result['wall_time_s']:>9.3f}s "
+                  f"{result['can_place_piece_calls']:>9} llamadas  {result['bins_used']:>4} bins  "
+                  f"{result['utilization']:>6.2f}%", file=log)
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results
+    }
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.1,
+            log=sys.stderr) -> List[str]:
+    """Compara dos corridas y retorna las regresiones encontradas.
+    
+    Es una regresión que el throughput (piezas por segundo) caiga más de
+    ``threshold`` (fracción) o que se usen más bins o queden piezas sin
+    colocar en un mismo caso.
+    """
+    base = {(r["instance"], r["algorithm"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        key = (result["instance"], result["algorithm"])
+        previous = base.get(key)
+        if previous is None:
+            continue
+        name = f"{key[0]} / {key[1]}"
+        if previous["pieces_per_s"] and result["pieces_per_s"] is not None:
+            change = result["pieces_per_s"] / previous["pieces_per_s"] - 1
+            print(f"{name:<42} throughput {change:+.1%}", file=log)
+            if change < -threshold:
+                regressions.append(f"{name}: throughput {change:+.1%} (límite -{threshold:.0%})")
+        if result["bins_used"] > previous["bins_used"]:
+            regressions.append(f"{name}: bins {previous['bins_used']} -> {result['bins_used']}")
+        if result["unplaced"] > previous["unplaced"]:
+            regressions.append(f"{name}: sin colocar {previous['unplaced']} -> {result['unplaced']}")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del motor de nesting")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run = commands.add_parser("run", help="Ejecuta una suite y escribe los resultados en JSON")
+    run.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    run.add_argument("--algorithms", default=",".join(DEFAULT_ALGORITHMS),
+                     help="Lista separada por comas")
+    run.add_argument("--no-shapes", action="store_true", help="Omitir los conjuntos de formas locales")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", help="Archivo de salida (por defecto stdout)")
+    
+    cmp = commands.add_parser("compare", help="Falla si hay regresiones respecto de una corrida base")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=0.1,
+                     help="Caída de throughput tolerada (fracción)")
+    
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        report = run_suite(load_instances(args.suite, not args.no_shapes),
+                           [a for a in args.algorithms.split(",") if a], args.seed)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        else:
+            json.dump(report, sys.stdout, indent=2)
+        return 0
+    
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    for regression in regressions:
+        print(f"REGRESIÓN {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
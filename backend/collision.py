@@ -0,0 +1,251 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+from spatial_index import PlacedPiecesIndex
+
+# Tolerancia para considerar contacto (no colisión) en el SAT
+SAT_TOLERANCE = 1e-7
+
+def _is_convex(polygon: Polygon) -> bool:
+    return polygon.convex_hull.area - polygon.area <= 1e-9 * max(polygon.area, 1.0)
+
+def convex_decomposition(polygon: Polygon) -> List[Polygon]:
+    """Descompone un polígono en piezas convexas.
+
+    Triangula con Delaunay restringido y une triángulos vecinos mientras la
+    unión siga siendo convexa. Sin soporte de triangulación restringida
+    (Shapely < 2.1) usa la envolvente convexa, que es conservadora.
+    """
+    if _is_convex(polygon):
+        return [polygon]
+    
+    triangulate = getattr(shapely, "constrained_delaunay_triangles", None)
+    if triangulate is None:
+        return [polygon.convex_hull]
+    
+    parts = [g for g in triangulate(polygon).geoms if g.area > 0]
+    merged = True
+    while merged and len(parts) > 1:
+        merged = False
+        for i in range(len(parts)):
+            for j in range(i + 1, len(parts)):
+                # Solo se unen piezas que comparten una arista
+                if parts[i].intersection(parts[j]).length <= 0:
+                    continue
+                union = parts[i].union(parts[j])
+                if union.geom_type == "Polygon" and _is_convex(union):
+                    parts[i] = shapely.normalize(union.simplify(0))
+                    del parts[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return parts
+
+class ConvexParts:
+    """Piezas convexas de un polígono, en arreglos listos para el SAT.
+
+    ``vertices`` (P, K, 2) rellena cada parte repitiendo su último vértice;
+    ``axes`` (P, K, 2) son las normales unitarias de sus aristas (las
+    aristas de relleno repiten la primera normal) y ``proj_min``/``proj_max``
+    (P, K) la proyección de cada parte sobre sus propios ejes.
+    """
+    
+    def __init__(self, vertices: np.ndarray, boxes: np.ndarray):
+        self.vertices = vertices
+        self.boxes = boxes  # (P, 4)
+        self.axes = edge_normals(vertices)
+        proj = np.einsum('pkd,pad->pak', vertices, self.axes)
+        self.proj_min = proj.min(axis=-1)
+        self.proj_max = proj.max(axis=-1)
+        self._padded = {vertices.shape[1]: self}
+    
+    @classmethod
+    def from_polygon(cls, polygon: Polygon) -> "ConvexParts":
+        parts = convex_decomposition(polygon)
+        rings = [shapely.get_coordinates(p.exterior)[:-1] for p in parts]
+        size = max(len(r) for r in rings)
+        return cls(pad_parts(rings, size), np.array([p.bounds for p in parts], dtype=np.float64))
+    
+    @property
+    def max_vertices(self) -> int:
+        return self.vertices.shape[1]
+    
+    def translated(self, dx: float, dy: float) -> "ConvexParts":
+        """Copia trasladada (los ejes no cambian, las proyecciones se desplazan)"""
+        clone = object.__new__(ConvexParts)
+        clone.vertices = self.vertices + (dx, dy)
+        clone.boxes = self.boxes + (dx, dy, dx, dy)
+        clone.axes = self.axes
+        shift = self.axes @ np.array([dx, dy])
+        clone.proj_min = self.proj_min + shift
+        clone.proj_max = self.proj_max + shift
+        clone._padded = {clone.vertices.shape[1]: clone}
+        return clone
+    
+    def padded(self, size: int) -> "ConvexParts":
+        """Versión con ``size`` vértices por parte (se calcula una vez)"""
+        result = self._padded.get(size)
+        if result is None:
+            result = ConvexParts(pad_parts(list(self.vertices), size), self.boxes)
+            self._padded[size] = result
+        return result
+
+def edge_normals(vertices: np.ndarray) -> np.ndarray:
+    """Normales unitarias de las aristas de cada parte (P, K, 2)"""
+    edges = np.roll(vertices, -1, axis=1) - vertices
+    normals = np.stack((-edges[..., 1], edges[..., 0]), axis=-1)
+    lengths = np.linalg.norm(normals, axis=-1, keepdims=True)
+    valid = lengths[..., 0] > 0
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    # Las aristas degeneradas (del relleno) repiten la primera normal válida
+    first = normals[np.arange(len(normals)), valid.argmax(axis=1)]
+    return np.where(valid[..., None], normals, first[:, None, :])
+
+def pad_parts(rings: List[np.ndarray], size: int) -> np.ndarray:
+    """Rellena cada anillo repitiendo su último vértice hasta ``size`` vértices"""
+    padded = np.empty((len(rings), size, 2), dtype=np.float64)
+    for i, ring in enumerate(rings):
+        padded[i, :len(ring)] = ring
+        padded[i, len(ring):] = ring[-1]
+    return padded
+
+class ConvexPartsCache:
+    """Cache LRU de descomposiciones convexas por geometría normalizada"""
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        # Atajo por identidad para geometrías que se consultan muchas veces
+        # (variantes de plantillas); guarda el polígono para que su id no se reutilice
+        self.by_id = OrderedDict()
+    
+    def get(self, polygon: Polygon):
+        """Retorna (ConvexParts de la pieza normalizada, desplazamiento x, y)"""
+        minx, miny = polygon.bounds[0], polygon.bounds[1]
+        cached = self.by_id.get(id(polygon))
+        if cached is not None and cached[0] is polygon:
+            return cached[1], minx, miny
+        
+        coords = shapely.get_coordinates(polygon.exterior) - (minx, miny)
+        key = np.round(coords, 9).tobytes()
+        parts = self.entries.get(key)
+        if parts is None:
+            parts = ConvexParts.from_polygon(shapely.polygons(coords))
+            self.entries[key] = parts
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        
+        self.by_id[id(polygon)] = (polygon, parts)
+        if len(self.by_id) > self.max_entries:
+            self.by_id.popitem(last=False)
+        return parts, minx, miny
+
+_convex_cache = ConvexPartsCache()
+
+def sat_collide(a: ConvexParts, a_idx: np.ndarray, b: ConvexParts, b_idx: np.ndarray,
+                offset: Tuple[float, float] = (0.0, 0.0),
+                tolerance: float = SAT_TOLERANCE) -> np.ndarray:
+    """SAT vectorizado sobre pares de partes convexas.
+
+    Evalúa los pares (a[a_idx[i]], b[b_idx[i]]), ambos con la misma cantidad
+    de vértices por parte. Retorna un arreglo booleano que es True si los
+    interiores se solapan; el contacto en el borde no cuenta como colisión.
+    ``offset`` traslada las partes de ``a`` sin copiar sus arreglos.
+    """
+    a_vertices, a_axes = a.vertices[a_idx], a.axes[a_idx]
+    b_vertices, b_axes = b.vertices[b_idx], b.axes[b_idx]
+    shift = a_axes @ np.asarray(offset, dtype=np.float64)
+    
+    # Proyección de cada parte sobre los ejes de la otra; la traslación de
+    # ``a`` solo desplaza sus intervalos
+    b_on_a = np.einsum('mkd,mad->mak', b_vertices, a_axes) - shift[..., None]
+    a_on_b = np.einsum('mkd,mad->mak', a_vertices, b_axes) + (b_axes @ np.asarray(offset, dtype=np.float64))[..., None]
+    
+    separated_a = ((a.proj_max[a_idx] <= b_on_a.min(axis=-1) + tolerance) |
+                   (b_on_a.max(axis=-1) <= a.proj_min[a_idx] + tolerance))
+    separated_b = ((b.proj_max[b_idx] <= a_on_b.min(axis=-1) + tolerance) |
+                   (a_on_b.max(axis=-1) <= b.proj_min[b_idx] + tolerance))
+    return ~(separated_a.any(axis=1) | separated_b.any(axis=1))
+
+class ConvexCollisionIndex(PlacedPiecesIndex):
+    """Índice de piezas colocadas que detecta colisiones sin predicados de Shapely.
+
+    Fase amplia: comparación de bounding boxes de todas las partes convexas
+    colocadas con operaciones de NumPy. Fase estrecha: SAT vectorizado solo
+    sobre los pares que sobreviven.
+    """
+    
+    def __init__(self, cell_size: float, cache: Optional[ConvexPartsCache] = None):
+        super().__init__(cell_size)
+        self.cache = cache or _convex_cache
+        self.placed_parts = []  # ConvexParts ya trasladadas
+        self._max_vertices = 0
+        self._stacked = None
+    
+    def insert(self, polygon: Polygon):
+        super().insert(polygon)
+        parts, dx, dy = self.cache.get(polygon)
+        self.placed_parts.append(parts.translated(dx, dy))
+        self._max_vertices = max(self._max_vertices, parts.max_vertices)
+        self._stacked = None
+    
+    def collides(self, polygon: Polygon) -> bool:
+        return self.collides_at(polygon, 0.0, 0.0)
+    
+    def collides_at(self, piece: Polygon, x: float, y: float) -> bool:
+        parts, minx, miny = self.cache.get(piece)
+        return self.collides_parts(parts, minx + x, miny + y)
+    
+    def collides_parts(self, parts: ConvexParts, x: float, y: float) -> bool:
+        """Verifica colisión de una pieza descompuesta (normalizada) trasladada a (x, y)"""
+        if not self.placed_parts:
+            return False
+        placed = self._stack()
+        
+        # Fase amplia: AABB de cada parte candidata contra todas las colocadas
+        boxes = placed.boxes
+        eps = SAT_TOLERANCE
+        cand = parts.boxes + (x, y, x, y)
+        overlap = ((cand[:, None, 0] < boxes[None, :, 2] - eps) &
+                   (cand[:, None, 2] > boxes[None, :, 0] + eps) &
+                   (cand[:, None, 1] < boxes[None, :, 3] - eps) &
+                   (cand[:, None, 3] > boxes[None, :, 1] + eps))
+        cand_idx, placed_idx = np.nonzero(overlap)
+        if cand_idx.size == 0:
+            return False
+        
+        # Fase estrecha: SAT solo sobre los pares sobrevivientes
+        size = placed.max_vertices
+        if parts.max_vertices > size:
+            placed = self._stack(parts.max_vertices)
+            size = parts.max_vertices
+        candidate = parts.padded(size)
+        return bool(sat_collide(candidate, cand_idx, placed, placed_idx, (x, y)).any())
+    
+    def copy(self) -> "ConvexCollisionIndex":
+        clone = super().copy()
+        clone.cache = self.cache
+        clone.placed_parts = list(self.placed_parts)
+        clone._max_vertices = self._max_vertices
+        clone._stacked = self._stacked
+        return clone
+    
+    def _stack(self, min_size: int = 0) -> ConvexParts:
+        """Todas las partes colocadas apiladas con un relleno común"""
+        size = max(min_size, self._max_vertices)
+        if self._stacked is None or self._stacked.max_vertices != size:
+            padded = [p.padded(size) for p in self.placed_parts]
+            stacked = object.__new__(ConvexParts)
+            stacked.vertices = np.concatenate([p.vertices for p in padded])
+            stacked.boxes = np.concatenate([p.boxes for p in padded])
+            stacked.axes = np.concatenate([p.axes for p in padded])
+            stacked.proj_min = np.concatenate([p.proj_min for p in padded])
+            stacked.proj_max = np.concatenate([p.proj_max for p in padded])
+            stacked._padded = {size: stacked}
+            self._stacked = stacked
+        return self._stacked
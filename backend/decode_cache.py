@@ -0,0 +1,137 @@
+import os
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+class _TrieNode:
+    """Nodo del trie de prefijos: un gen (pieza, rotación) por nivel"""
+    
+    __slots__ = ('parent', 'gene', 'children', 'snapshot')
+    
+    def __init__(self, parent: Optional["_TrieNode"] = None, gene=None):
+        self.parent = parent
+        self.gene = gene
+        self.children = {}
+        self.snapshot = None  # (colocaciones, bins, bytes)
+
+class DecodeCache:
+    """Cache de decodificaciones parciales de individuos del algoritmo genético.
+    
+    Los layouts parciales (colocaciones y copias de los índices de cada bin)
+    se guardan en un trie indexado por los prefijos de genes; un individuo
+    retoma la decodificación desde su prefijo más largo en cache. Los
+    individuos repetidos toman el fitness de un cache por genoma completo.
+    El tamaño se limita en bytes aproximados con desalojo LRU.
+    
+    Los resultados solo son válidos para un mismo motor, piezas y
+    ``max_bins``: se crea un cache por ejecución.
+    """
+    
+    ENTRY_OVERHEAD = 200  # Bytes aproximados por pieza colocada en una instantánea
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, checkpoint_every: int = 4,
+                 max_fitness_entries: int = 100000):
+        self.max_bytes = max_bytes
+        self.checkpoint_every = checkpoint_every  # Cada cuántos genes se guarda una instantánea
+        self.max_fitness_entries = max_fitness_entries
+        self.root = _TrieNode()
+        self.lru = OrderedDict()  # nodo -> None, en orden de uso
+        self.fitness = OrderedDict()  # genoma -> fitness
+        self.current_bytes = 0
+        self.prefix_hits = 0
+        self.genes_skipped = 0
+        self.fitness_hits = 0
+    
+    def lookup(self, individual) -> Tuple[int, List, List]:
+        """Prefijo más largo en cache: (genes ya decodificados, colocaciones, bins).
+        
+        Las colocaciones y los bins retornados son copias que se pueden
+        seguir modificando.
+        """
+        node = self.root
+        best = None
+        depth = 0
+        for gene in individual:
+            node = node.children.get(gene)
+            if node is None:
+                break
+            depth += 1
+            if node.snapshot is not None:
+                best = (depth, node)
+        
+        if best is None:
+            return 0, [], []
+        depth, node = best
+        self.lru.move_to_end(node)
+        self.prefix_hits += 1
+        self.genes_skipped += depth
+        placements, bins, _ = node.snapshot
+        return depth, list(placements), [placed_pieces.copy() for placed_pieces in bins]
+    
+    def should_store(self, depth: int) -> bool:
+        """Indica si conviene guardar la instantánea tras ``depth`` genes"""
+        return depth % self.checkpoint_every == 0
+    
+    def store(self, prefix, placements: List, bins: List):
+        """Guarda una copia del layout parcial tras decodificar ``prefix``"""
+        node = self.root
+        for gene in prefix:
+            child = node.children.get(gene)
+            if child is None:
+                child = _TrieNode(node, gene)
+                node.children[gene] = child
+            node = child
+        if node.snapshot is not None:
+            self.lru.move_to_end(node)
+            return
+        
+        size = self._estimate_bytes(bins)
+        node.snapshot = (list(placements), [placed_pieces.copy() for placed_pieces in bins], size)
+        self.lru[node] = None
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes and self.lru:
+            self._evict(next(iter(self.lru)))
+    
+    def get_fitness(self, individual) -> Optional[Tuple[float]]:
+        fitness = self.fitness.get(tuple(individual))
+        if fitness is not None:
+            self.fitness.move_to_end(tuple(individual))
+            self.fitness_hits += 1
+        return fitness
+    
+    def put_fitness(self, individual, fitness: Tuple[float]):
+        self.fitness[tuple(individual)] = fitness
+        if len(self.fitness) > self.max_fitness_entries:
+            self.fitness.popitem(last=False)
+    
+    def stats(self) -> dict:
+        return {
+            'snapshots': len(self.lru),
+            'bytes': self.current_bytes,
+            'prefix_hits': self.prefix_hits,
+            'genes_skipped': self.genes_skipped,
+            'fitness_entries': len(self.fitness),
+            'fitness_hits': self.fitness_hits
+        }
+    
+    def _evict(self, node: _TrieNode):
+        del self.lru[node]
+        self.current_bytes -= node.snapshot[2]
+        node.snapshot = None
+        # Podar las ramas que quedaron sin instantáneas
+        while node.parent is not None and not node.children and node.snapshot is None:
+            del node.parent.children[node.gene]
+            node = node.parent
+    
+    def _estimate_bytes(self, bins: List) -> int:
+        size = 0
+        for placed_pieces in bins:
+            size += len(placed_pieces) * self.ENTRY_OVERHEAD
+            size += sum(skyline.heights.nbytes for skyline in placed_pieces.skylines.values())
+        return size
+
+def create_decode_cache() -> DecodeCache:
+    """Crea un cache de decodificación configurado por variables de entorno"""
+    return DecodeCache(
+        max_bytes=int(float(os.environ.get("GA_DECODE_CACHE_MAX_MB", 64)) * 1024 * 1024),
+        checkpoint_every=int(os.environ.get("GA_DECODE_CACHE_CHECKPOINT", 4))
+    )
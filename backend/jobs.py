@@ -0,0 +1,208 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from models import NestingRequest, JobStatus
+from nesting_engine import NestingCancelled
+from nesting_service import NestingService
+from response_formats import to_compact
+
+class JobQueueFull(Exception):
+    """Se lanza cuando la cola de trabajos alcanzó su capacidad"""
+    pass
+
+class NestingJob:
+    """Estado de un trabajo de nesting en segundo plano"""
+    
+    def __init__(self, request: NestingRequest):
+        self.job_id = uuid.uuid4().hex
+        self.request = request
+        self.status = "queued"  # "queued", "running", "completed", "failed", "cancelled"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.best_layout = None  # Mejor layout intermedio publicado por el motor
+        self.best_metrics = None  # Métricas del mejor layout intermedio
+        self.accepted = False
+        self.subscribers = []
+        self.lock = threading.Lock()
+    
+    def subscribe(self) -> queue.Queue:
+        """Retorna una cola que recibe los eventos (tipo, datos) del trabajo"""
+        events = queue.Queue()
+        with self.lock:
+            if self.best_layout is not None:
+                events.put(("layout", {'metrics': self.best_metrics, 'layout': self.formatted(self.best_layout)}))
+            if self.finished:
+                events.put((self.status, self.formatted(self.result) if self.result is not None else self.error))
+            else:
+                self.subscribers.append(events)
+        return events
+    
+    def publish(self, event: str, data):
+        """Envía un evento a todos los suscriptores"""
+        with self.lock:
+            for events in self.subscribers:
+                events.put((event, data))
+    
+    def formatted(self, response):
+        """Respuesta en el formato pedido; los formatos no "full" salen como JSON compacto"""
+        if response is None or self.request.response_format == "full":
+            return response
+        return to_compact(self.request, response)
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+    
+    def to_status(self) -> JobStatus:
+        """Convierte el trabajo al modelo de respuesta"""
+        return JobStatus(
+            job_id=self.job_id,
+            status=self.status,
+            progress=self.progress,
+            result=self.formatted(self.result),
+            error=self.error,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at
+        )
+
+class JobManager:
+    """Ejecuta solicitudes de nesting en un pool acotado de workers.
+
+    Los trabajos corren en hilos para no bloquear el event loop; la
+    cancelación es cooperativa a través de ``NestingEngine.should_stop``.
+    """
+    
+    def __init__(self, max_workers: int = 2, max_pending: int = 100, max_finished: int = 200):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nesting-job")
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def submit(self, request: NestingRequest) -> NestingJob:
+        """Encola una solicitud y retorna el trabajo creado"""
+        with self.lock:
+            if self.pending_count() >= self.max_pending:
+                raise JobQueueFull("La cola de trabajos está llena")
+            job = NestingJob(request)
+            self.jobs[job.job_id] = job
+            self._prune_finished()
+            job.future = self.executor.submit(self._run, job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[NestingJob]:
+        """Retorna el trabajo con el id dado o None"""
+        with self.lock:
+            return self.jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> Optional[NestingJob]:
+        """Cancela un trabajo encolado o en ejecución"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            # Todavía no había empezado
+            self._finish(job, "cancelled")
+        return job
+    
+    def accept(self, job_id: str) -> Optional[NestingJob]:
+        """Acepta el mejor layout publicado hasta ahora y libera el worker"""
+        job = self.get(job_id)
+        if job is None or job.finished or job.best_layout is None:
+            return job
+        
+        job.accepted = True
+        job.cancel_event.set()
+        return job
+    
+    def pending_count(self) -> int:
+        """Cantidad de trabajos encolados o en ejecución"""
+        return sum(1 for job in self.jobs.values() if not job.finished)
+    
+    def status_counts(self) -> dict:
+        """Cantidad de trabajos conocidos por estado"""
+        with self.lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+    
+    def shutdown(self):
+        """Cancela los trabajos pendientes y detiene el pool"""
+        for job in list(self.jobs.values()):
+            job.cancel_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _run(self, job: NestingJob):
+        """Ejecuta un trabajo dentro del pool"""
+        if job.cancel_event.is_set():
+            self._finish(job, "cancelled")
+            return
+        
+        job.status = "running"
+        job.started_at = time.time()
+        
+        def update_progress(progress: float):
+            job.progress = min(max(progress, 0.0), 1.0)
+        
+        def update_layout(layout, metrics: dict):
+            job.best_layout = layout
+            job.best_metrics = metrics
+            job.publish("layout", {'metrics': metrics, 'layout': job.formatted(layout)})
+        
+        try:
+            result = NestingService().process_nesting_request(
+                job.request,
+                progress_callback=update_progress,
+                should_stop=job.cancel_event.is_set,
+                layout_callback=update_layout
+            )
+        except NestingCancelled:
+            if job.accepted:
+                # El operador aceptó el mejor layout intermedio
+                job.result = job.best_layout.model_copy(update={'stop_reason': "accepted"})
+                self._finish(job, "completed")
+            else:
+                self._finish(job, "cancelled")
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, "failed")
+        else:
+            job.result = result
+            job.progress = 1.0
+            self._finish(job, "completed")
+    
+    def _finish(self, job: NestingJob, status: str):
+        with job.lock:
+            job.status = status
+            job.finished_at = time.time()
+            subscribers, job.subscribers = job.subscribers, []
+        for events in subscribers:
+            events.put((status, job.formatted(job.result) if job.result is not None else job.error))
+    
+    def _prune_finished(self):
+        """Descarta los trabajos terminados más antiguos"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+def create_job_manager() -> JobManager:
+    """Crea el JobManager usando la configuración del entorno"""
+    return JobManager(
+        max_workers=int(os.environ.get("NESTING_JOB_WORKERS", 2)),
+        max_pending=int(os.environ.get("NESTING_MAX_PENDING_JOBS", 100))
+    )
@@ -1,14 +1,42 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import queue
+from typing import List
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 import uvicorn
-from models import NestingRequest, NestingResponse
+from models import NestingRequest, NestingResponse, JobStatus, BatchItem
 from nesting_service import NestingService
+from jobs import create_job_manager, JobQueueFull
+from batch import create_batch_executor
+from nfp_cache import get_nfp_cache
+from result_cache import get_result_cache
+from profiling import Profiler, format_metric, get_metrics, profiling_enabled
+from response_formats import RESPONSE_FORMATS, to_compact, to_msgpack, iter_ndjson
+
+# Gestor de trabajos en segundo plano
+job_manager = create_job_manager()
+
+# Pool de procesos para los lotes de /nest/batch
+batch_executor = create_batch_executor()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    job_manager.shutdown()
+    batch_executor.shutdown()
 
 # Crear aplicación FastAPI
 app = FastAPI(
     title="Nesting API", 
     description="API para optimización de nesting de piezas irregulares",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS para permitir conexiones desde React
@@ -20,17 +48,189 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Instancia del servicio de nesting
-nesting_service = NestingService()
+# Comprimir respuestas grandes cuando el cliente acepta gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+def format_response(request: NestingRequest, response: NestingResponse):
+    """Serializa la respuesta según ``request.response_format``.
+    
+    En solicitudes perfiladas la codificación se registra como la fase
+    "serialization" en ``get_metrics()``; con NDJSON se mide al emitir
+    cada línea del stream.
+    """
+    profiler = Profiler(enabled=request.profile or profiling_enabled())
+    if request.response_format == "ndjson":
+        with profiler.phase("serialization"):
+            compact = to_compact(request, response)
+        return StreamingResponse(_profiled_stream(iter_ndjson(compact), profiler), media_type="application/x-ndjson")
+    
+    with profiler.phase("serialization"):
+        if request.response_format == "full":
+            encoded = Response(response.model_dump_json(), media_type="application/json")
+        elif request.response_format == "msgpack":
+            encoded = Response(to_msgpack(to_compact(request, response)), media_type="application/x-msgpack")
+        else:
+            encoded = JSONResponse(to_compact(request, response))
+    get_metrics().merge(profiler)
+    return encoded
+
+def _profiled_stream(chunks, profiler: Profiler):
+    """Emite ``chunks`` midiendo solo su generación (no la espera del cliente)"""
+    try:
+        while True:
+            with profiler.phase("serialization"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        get_metrics().merge(profiler)
 
 @app.post("/nest", response_model=NestingResponse)
 async def nest_pieces(request: NestingRequest):
-    """Endpoint principal para realizar nesting de piezas"""
+    """Endpoint principal para realizar nesting de piezas.
+    
+    Con ``response_format`` distinto de "full" retorna cada geometría una
+    sola vez y solo las transformaciones por pieza (JSON compacto,
+    MessagePack o NDJSON).
+    """
+    if request.response_format not in RESPONSE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"response_format inválido: {request.response_format}")
     try:
-        return nesting_service.process_nesting_request(request)
+        # Se ejecuta fuera del event loop para no bloquear otras solicitudes
+        response = await run_in_threadpool(NestingService().process_nesting_request, request)
+        return format_response(request, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en nesting: {str(e)}")
 
+def _batch_item(index: int, request: NestingRequest, response: NestingResponse = None,
+                error: Exception = None) -> dict:
+    """Resultado de una solicitud del lote en su formato pedido (binarios como compacto)"""
+    if error is not None:
+        return BatchItem(index=index, error=str(error)).model_dump()
+    if request.response_format == "full":
+        return BatchItem(index=index, result=jsonable_encoder(response)).model_dump()
+    return BatchItem(index=index, result=to_compact(request, response)).model_dump()
+
+async def _batch_stream(requests: List[NestingRequest], tasks, http_request: Request):
+    """Emite una línea NDJSON por solicitud a medida que terminan"""
+    futures = {asyncio.wrap_future(future): indexes for indexes, future in tasks}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=0.5, return_when=asyncio.FIRST_COMPLETED)
+            if await http_request.is_disconnected():
+                break
+            for future in sorted(done, key=lambda future: futures[future][0]):
+                error = future.exception()
+                response = future.result() if error is None else None
+                for index in futures[future]:
+                    yield json.dumps(_batch_item(index, requests[index], response, error)) + "\n"
+    finally:
+        # Si el cliente se fue, no seguir ocupando el pool
+        for future in pending:
+            future.cancel()
+
+def _sse_event(event: str, data) -> str:
+    """Formatea un evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def _job_event_stream(job, http_request: Request):
+    """Emite los eventos de un trabajo hasta que termine o el cliente se desconecte"""
+    events = job.subscribe()
+    yield _sse_event("job", {"job_id": job.job_id})
+    try:
+        while True:
+            try:
+                event, data = events.get_nowait()
+            except queue.Empty:
+                if await http_request.is_disconnected():
+                    break
+                await asyncio.sleep(0.1)
+                continue
+            
+            yield _sse_event(event, data)
+            if event != "layout":
+                return
+    finally:
+        # Si el cliente se fue sin aceptar el resultado, liberar el worker
+        if not job.finished and not job.accepted:
+            job_manager.cancel(job.job_id)
+
+@app.post("/nest/stream")
+async def nest_pieces_stream(request: NestingRequest, http_request: Request):
+    """Nesting con Server-Sent Events: emite cada layout mejor encontrado.
+    
+    Eventos: ``job`` (id del trabajo), ``layout`` (mejor layout y métricas)
+    y uno final ``completed``, ``cancelled`` o ``failed``.
+    """
+    try:
+        job = job_manager.submit(request)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return StreamingResponse(_job_event_stream(job, http_request), media_type="text/event-stream")
+
+@app.post("/nest/batch")
+async def nest_batch(requests: List[NestingRequest], http_request: Request, stream: bool = False):
+    """Resuelve un lote de solicitudes en paralelo en un pool de procesos.
+    
+    Retorna un ``BatchItem`` por solicitud, en el orden del lote. Con
+    ``stream=true`` emite NDJSON, una línea por solicitud a medida que
+    terminan (el campo ``index`` indica a cuál corresponde). Los formatos
+    binarios se entregan como respuesta compacta.
+    """
+    for request in requests:
+        if request.response_format not in RESPONSE_FORMATS:
+            raise HTTPException(status_code=400, detail=f"response_format inválido: {request.response_format}")
+    try:
+        tasks = batch_executor.submit(requests)
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    if stream:
+        return StreamingResponse(_batch_stream(requests, tasks, http_request), media_type="application/x-ndjson")
+    
+    items = [None] * len(requests)
+    outcomes = await asyncio.gather(*(asyncio.wrap_future(future) for _, future in tasks), return_exceptions=True)
+    for (indexes, _), outcome in zip(tasks, outcomes):
+        error = outcome if isinstance(outcome, BaseException) else None
+        for index in indexes:
+            items[index] = _batch_item(index, requests[index], None if error else outcome, error)
+    return JSONResponse(items)
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def create_job(request: NestingRequest):
+    """Encola un trabajo de nesting y retorna su id inmediatamente"""
+    try:
+        job = job_manager.submit(request)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.to_status()
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Retorna estado, avance y resultado de un trabajo"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job.to_status()
+
+@app.delete("/jobs/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    """Cancela un trabajo encolado o en ejecución"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job.to_status()
+
+@app.post("/jobs/{job_id}/accept", response_model=JobStatus)
+async def accept_job(job_id: str):
+    """Acepta el mejor layout intermedio y detiene el trabajo"""
+    job = job_manager.accept(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job.to_status()
+
 @app.get("/")
 async def root():
     """Endpoint de prueba"""
@@ -39,7 +239,40 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "nesting-api"}
+    return {
+        "status": "healthy",
+        "service": "nesting-api",
+        "nfp_cache": get_nfp_cache().stats(),
+        "result_cache": get_result_cache().stats()
+    }
+
+def _cache_metrics(prefix: str, stats: dict) -> list:
+    """Métricas de Prometheus de un cache a partir de su ``stats()``"""
+    return (
+        format_metric(f"{prefix}_hits_total", "counter", "Aciertos del cache", [({}, stats['hits'])]) +
+        format_metric(f"{prefix}_misses_total", "counter", "Fallos del cache", [({}, stats['misses'])]) +
+        format_metric(f"{prefix}_hit_ratio", "gauge", "Fracción de aciertos del cache", [({}, stats['hit_rate'])]) +
+        format_metric(f"{prefix}_entries", "gauge", "Entradas en memoria", [({}, stats['entries'])]) +
+        format_metric(f"{prefix}_bytes", "gauge", "Bytes aproximados en memoria", [({}, stats['bytes'])])
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas en formato de texto de Prometheus: cola de trabajos, caches y tiempos de resolución"""
+    statuses = job_manager.status_counts()
+    lines = format_metric(
+        "nesting_jobs", "gauge", "Trabajos conocidos por estado",
+        [({'status': status}, statuses.get(status, 0))
+         for status in ("queued", "running", "completed", "failed", "cancelled")]
+    )
+    lines += format_metric("nesting_job_queue_depth", "gauge", "Trabajos encolados o en ejecución",
+                           [({}, statuses.get("queued", 0) + statuses.get("running", 0))])
+    lines += format_metric("nesting_job_queue_capacity", "gauge", "Trabajos pendientes admitidos",
+                           [({}, job_manager.max_pending)])
+    lines += _cache_metrics("nesting_nfp_cache", get_nfp_cache().stats())
+    lines += _cache_metrics("nesting_result_cache", get_result_cache().stats())
+    lines += get_metrics().render()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
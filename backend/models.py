@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Union
 
 class Point(BaseModel):
     x: float
@@ -14,9 +14,25 @@ class NestingRequest(BaseModel):
     pieces: List[PieceData]
     bin_width: float
     bin_height: float
-    algorithm: str = "best_fit"  # "genetic", "bottom_left", "best_fit"
+    algorithm: str = "best_fit"  # "genetic", "annealing", "bottom_left", "best_fit", "nfp", "raster"
     rotation_step: float = 90.0  # Grados
+    position_tolerance: Optional[float] = Field(None, gt=0)  # Precisión de las posiciones (None = derivada del bin y las piezas)
     max_bins: Optional[int] = None  # Límite máximo de bins a usar
+    workers: Optional[int] = Field(None, ge=1)  # Procesos para evaluar el fitness del algoritmo genético (hasta NESTING_MAX_GA_WORKERS o las CPUs)
+    time_limit_ms: Optional[int] = Field(None, gt=0)  # Presupuesto de tiempo del algoritmo genético
+    max_stall_generations: Optional[int] = Field(None, ge=1)  # Generaciones sin mejora antes de detenerse
+    seed: Optional[int] = None  # Semilla de los algoritmos genético y de recocido (ejecuciones reproducibles)
+    islands: Optional[int] = Field(None, ge=1)  # Poblaciones genéticas independientes, una por proceso (hasta NESTING_MAX_ISLANDS o las CPUs)
+    migration_interval: int = 5  # Generaciones entre migraciones de individuos entre islas
+    use_cache: bool = True  # Reutilizar resultados de solicitudes equivalentes
+    response_format: str = "full"  # "full", "compact", "msgpack", "ndjson"
+    collision_backend: str = "shapely"  # "shapely" o "sat" (descomposición convexa + SAT vectorizado)
+    raster_resolution: Optional[float] = None  # Lado de celda del algoritmo "raster" (por defecto 1/256 del bin)
+    raster_exact_check: bool = False  # Verificar con Shapely cada posición elegida por "raster"
+    profile: bool = False  # Incluir en la respuesta el desglose de tiempos por fase
+    rectangle_fast_path: bool = True  # Empaquetar los rectángulos con MaxRects en los algoritmos constructivos
+    approximation: Optional[str] = None  # Colocación gruesa con piezas aproximadas: "simplified" o "hull"
+    simplify_tolerance: Optional[float] = None  # Tolerancia de "simplified" (por defecto 1/1000 del bin)
 
 class PlacedPiece(BaseModel):
     id: str
@@ -39,7 +55,26 @@ class NestingResponse(BaseModel):
     utilization: float  # Utilización promedio
     computation_time: float
     bins_data: Optional[Dict[int, Dict[str, Any]]] = None  # Información detallada por bin
+    unplaced_pieces: List[str] = []  # Ids de piezas que no se pudieron colocar
+    stop_reason: str = "completed"  # "completed", "time_limit", "stalled", "lower_bound"
+    cache_hit: bool = False  # True si la respuesta salió del cache de resultados
+    profile: Optional[Dict[str, Any]] = None  # Tiempos por fase y contadores (solo con profile=True)
     
     class Config:
         # Permitir campos adicionales para flexibilidad
-        extra = "allow"
\ No newline at end of file
+        extra = "allow"
+
+class BatchItem(BaseModel):
+    index: int  # Posición de la solicitud en el lote
+    result: Optional[Any] = None  # NestingResponse, o la respuesta compacta si response_format no es "full"
+    error: Optional[str] = None
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str  # "queued", "running", "completed", "failed", "cancelled"
+    progress: float = 0.0  # Avance entre 0 y 1
+    result: Optional[Union[NestingResponse, Dict[str, Any]]] = None  # Compacta si response_format no es "full"
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
@@ -1,23 +1,102 @@
 import numpy as np
-from shapely.geometry import Polygon, Point
+import shapely
+from shapely.geometry import Polygon, Point, LineString, box
 from shapely.affinity import translate, rotate
+from shapely.ops import unary_union
 import pyclipper
 from deap import base, creator, tools, algorithms
 import random
 import math
-from typing import List, Tuple
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import List, Tuple, Optional, Callable
 from models import Point
+from nfp_cache import NFPCache, get_nfp_cache, _shape_keys
+from spatial_index import PlacedPiecesIndex
+from collision import ConvexCollisionIndex
+from raster import RasterIndex, rasterize
+from skyline import SkylineDomain, _profile_cache
+from part_templates import PieceInstance, instances_from_polygons
+from decode_cache import create_decode_cache
+from profiling import NULL_PROFILER
+
+# Colocación de una pieza: (índice de bin, x, y, rotación)
+Placement = Tuple[int, float, float, float]
+
+# Pesos del puntaje de best_fit: altura final, área perdida y contacto
+BEST_FIT_WEIGHTS = (1.0, 0.5, 0.5)
 
 # Configurar DEAP
 creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
 creator.create("Individual", list, fitness=creator.FitnessMin)
 
+def process_limit(variable: str) -> int:
+    """Máximo de procesos de una ejecución: ``variable`` del entorno o la cantidad de CPUs"""
+    limit = int(os.environ.get(variable, 0))
+    return limit if limit > 0 else os.cpu_count() or 1
+
+class NestingCancelled(Exception):
+    """Se lanza cuando se cancela una ejecución de nesting en curso"""
+    pass
+
 class NestingEngine:
-    def __init__(self, bin_width: float, bin_height: float, rotation_step: float = 90.0):
+    def __init__(self, bin_width: float, bin_height: float, rotation_step: float = 90.0,
+                 nfp_cache: Optional[NFPCache] = None, collision_backend: str = "shapely",
+                 position_tolerance: Optional[float] = None):
         self.bin_width = bin_width
         self.bin_height = bin_height
         self.rotation_step = rotation_step
-        self.nfp_cache = {}
+        self.collision_backend = collision_backend  # "shapely" o "sat" (convexas + SAT vectorizado)
+        self.nfp_cache = nfp_cache if nfp_cache is not None else get_nfp_cache()
+        self.clipper_scale = 10000  # pyclipper trabaja con enteros
+        self.nfp_tolerance = 1e-3
+        self.progress_callback = None  # Recibe el avance (0-1) del algoritmo en curso
+        self.should_stop = None  # Retorna True si se debe cancelar la ejecución
+        self.started_at = time.monotonic()
+        self.deadline = None  # Límite de tiempo (time.monotonic) para los algoritmos iterativos
+        self.max_stall_generations = None  # Generaciones sin mejora antes de detenerse
+        self.stop_reason = None  # Motivo por el que se detuvo el último algoritmo iterativo
+        self.layout_callback = None  # Recibe (colocaciones, métricas) al encontrar un layout mejor
+        self.raster_resolution = None  # Lado de celda del modo raster (None = 1/256 del lado mayor)
+        self.raster_exact_check = False  # Verificar con Shapely la posición elegida en modo raster
+        self.raster_masks = {}  # id(variante) -> (variante, máscara, espectro)
+        self.position_tolerance = position_tolerance  # Precisión pedida para las posiciones (None = automática)
+        self.search_step = None  # Paso de la pasada gruesa, ver configure_search
+        self.search_tolerance = None  # Precisión del refinamiento por bisección
+        self.configure_search([])
+        self.decode_cache = None  # DecodeCache de la ejecución genética en curso
+        self.seed = None  # Semilla del algoritmo genético (None = no reproducible)
+        self.rng = random.Random()  # Generador de la ejecución genética en curso
+        self.profiler = NULL_PROFILER  # Tiempos por fase de la solicitud (ver profiling.Profiler)
+        self.preplaced = []  # Polígonos ya colocados por bin con los que arranca cada algoritmo
+    
+    def worker_settings(self) -> dict:
+        """Parámetros para crear un motor equivalente en otro proceso"""
+        return {
+            'bin_width': self.bin_width,
+            'bin_height': self.bin_height,
+            'rotation_step': self.rotation_step,
+            'collision_backend': self.collision_backend,
+            'position_tolerance': self.position_tolerance
+        }
+    
+    def report_layout(self, placements: List[Optional[Placement]], metrics: dict):
+        """Publica un layout intermedio (colocaciones en el orden original)"""
+        if self.layout_callback is not None:
+            self.layout_callback(placements, metrics)
+    
+    def check_cancelled(self):
+        """Lanza NestingCancelled si se solicitó cancelar la ejecución"""
+        if self.should_stop is not None and self.should_stop():
+            raise NestingCancelled()
+    
+    def report_progress(self, progress: float):
+        """Notifica el avance del algoritmo y cancela si se solicitó"""
+        self.check_cancelled()
+        if self.progress_callback is not None:
+            self.progress_callback(progress)
         
     def points_to_polygon(self, points: List[Point]) -> Polygon:
         """Convierte lista de puntos a polígono de Shapely"""
@@ -39,78 +118,232 @@ class NestingEngine:
         return rotate(polygon, angle, origin='centroid')
     
     def compute_nfp(self, stationary: Polygon, moving: Polygon) -> Polygon:
-        """Calcula el No-Fit Polygon entre dos piezas"""
-        # Crear clave para cache
-        stat_coords = tuple(stationary.exterior.coords)
-        mov_coords = tuple(moving.exterior.coords)
-        cache_key = (stat_coords, mov_coords)
+        """Calcula el No-Fit Polygon entre dos piezas.
         
-        if cache_key in self.nfp_cache:
-            return self.nfp_cache[cache_key]
+        El NFP es la suma de Minkowski ``stationary ⊕ (-moving)``: contiene
+        todas las traslaciones del origen de ``moving`` (ya normalizada) que
+        hacen que su interior se solape con ``stationary``. El borde del NFP
+        corresponde a posiciones en contacto.
+        """
+        # El NFP se calcula sobre la pieza fija normalizada y se traslada a
+        # su posición, así el cache sirve para cualquier ubicación.
+        offset_x, offset_y = stationary.bounds[0], stationary.bounds[1]
         
-        try:
-            # Usar pyclipper para calcular NFP
-            pc = pyclipper.Pyclipper()
-            
-            # Convertir a formato pyclipper (enteros)
-            scale = 1000
-            stat_path = [(int(x * scale), int(y * scale)) for x, y in stationary.exterior.coords[:-1]]
-            mov_path = [(int(x * scale), int(y * scale)) for x, y in moving.exterior.coords[:-1]]
-            
-            # Invertir moving polygon para NFP
-            mov_path = mov_path[::-1]
-            
-            pc.AddPath(stat_path, pyclipper.PT_SUBJECT, True)
-            pc.AddPath(mov_path, pyclipper.PT_CLIP, True)
+        # Clave canónica (independiente de la traslación) para el cache; la
+        # de cada pieza se calcula una vez por objeto
+        cache_key = NFPCache.pair_key(_shape_keys.get(stationary), _shape_keys.get(moving))
+        nfp = self.nfp_cache.get(cache_key)
+        
+        if nfp is None:
+            stationary_norm = translate(stationary, -offset_x, -offset_y)
+            try:
+                nfp = self._minkowski_nfp(stationary_norm, moving)
+            except Exception:
+                nfp = None
             
-            # Calcular diferencia (Minkowski sum)
-            solution = pc.Execute(pyclipper.CT_DIFFERENCE, pyclipper.PFT_EVENODD, pyclipper.PFT_EVENODD)
+            if nfp is None or nfp.is_empty:
+                # Fallback conservador: NFP de las bounding boxes
+                s_minx, s_miny, s_maxx, s_maxy = stationary_norm.bounds
+                m_minx, m_miny, m_maxx, m_maxy = moving.bounds
+                nfp = box(s_minx - m_maxx, s_miny - m_maxy, s_maxx - m_minx, s_maxy - m_miny)
             
-            if solution:
-                # Convertir de vuelta a coordenadas normales
-                nfp_coords = [(x / scale, y / scale) for x, y in solution[0]]
-                nfp = Polygon(nfp_coords)
-                self.nfp_cache[cache_key] = nfp
-                return nfp
-            else:
-                # Fallback: usar bounds
-                bounds = stationary.bounds
-                nfp = Polygon([
-                    (bounds[0], bounds[1]),
-                    (bounds[2], bounds[1]),
-                    (bounds[2], bounds[3]),
-                    (bounds[0], bounds[3])
-                ])
-                self.nfp_cache[cache_key] = nfp
-                return nfp
-                
-        except Exception:
-            # Fallback en caso de error
-            bounds = stationary.bounds
-            nfp = Polygon([
-                (bounds[0], bounds[1]),
-                (bounds[2], bounds[1]),
-                (bounds[2], bounds[3]),
-                (bounds[0], bounds[3])
-            ])
-            self.nfp_cache[cache_key] = nfp
-            return nfp
-    
-    def can_place_piece(self, piece: Polygon, x: float, y: float, placed_pieces: List[Polygon]) -> bool:
-        """Verifica si una pieza puede ser colocada en la posición dada"""
-        # Trasladar pieza a la posición
-        translated_piece = translate(piece, x, y)
-        
-        # Verificar que esté dentro del bin
-        if not self.is_within_bin(translated_piece):
+            self.nfp_cache.put(cache_key, nfp)
+        
+        offset = np.array([offset_x, offset_y])
+        return shapely.transform(nfp, lambda coords: coords + offset)
+    
+    def _minkowski_nfp(self, stationary: Polygon, moving: Polygon) -> Polygon:
+        """Suma de Minkowski ``stationary ⊕ (-moving)`` usando pyclipper"""
+        scale = self.clipper_scale
+        stat_path = pyclipper.scale_to_clipper(list(stationary.exterior.coords[:-1]), scale)
+        neg_path = pyclipper.scale_to_clipper([(-x, -y) for x, y in moving.exterior.coords[:-1]], scale)
+        
+        # La suma sobre un contorno cerrado solo barre el borde de la pieza
+        # fija; se une con la pieza trasladada por un vértice de -moving para
+        # rellenar el interior.
+        swept = pyclipper.MinkowskiSum(neg_path, stat_path, True)
+        ref_x, ref_y = neg_path[0]
+        filled = [(x + ref_x, y + ref_y) for x, y in stat_path]
+        
+        pc = pyclipper.Pyclipper()
+        pc.AddPaths(swept, pyclipper.PT_SUBJECT, True)
+        pc.AddPath(filled, pyclipper.PT_CLIP, True)
+        solution = pc.Execute(pyclipper.CT_UNION, pyclipper.PFT_NONZERO, pyclipper.PFT_NONZERO)
+        
+        outers = []
+        holes = []
+        for path in solution:
+            if len(path) < 3:
+                continue
+            ring = Polygon(pyclipper.scale_from_clipper(path, scale))
+            if pyclipper.Orientation(path):
+                outers.append(ring)
+            elif not ring.buffer(-1.0 / scale).is_empty:
+                # Los huecos más finos que una unidad de Clipper son restos del
+                # redondeo a enteros; su borde haría pasar por contacto
+                # posiciones con solape
+                holes.append(ring)
+        
+        if not outers:
+            return None
+        
+        nfp = unary_union(outers)
+        if holes:
+            nfp = nfp.difference(unary_union(holes))
+        if not nfp.is_valid:
+            # Clipper puede devolver anillos que se tocan en un vértice
+            nfp = shapely.make_valid(nfp)
+            nfp = unary_union([part for part in shapely.get_parts(nfp) if part.geom_type in ('Polygon', 'MultiPolygon')])
+        if nfp.geom_type == 'MultiPolygon':
+            nfp = max(nfp.geoms, key=lambda g: g.area)
+        return nfp
+    
+    def compute_ifr(self, piece: Polygon):
+        """Calcula el Inner-Fit Rectangle del bin para una pieza normalizada.
+        
+        Retorna (min_x, min_y, max_x, max_y) con el rango de posiciones válidas
+        del origen de la pieza, o None si la pieza no cabe en el bin.
+        """
+        width = piece.bounds[2] - piece.bounds[0]
+        height = piece.bounds[3] - piece.bounds[1]
+        max_x = self.bin_width - width
+        max_y = self.bin_height - height
+        if max_x < -self.nfp_tolerance or max_y < -self.nfp_tolerance:
+            return None
+        return (0.0, 0.0, max(max_x, 0.0), max(max_y, 0.0))
+    
+    def find_nfp_position(self, piece: Polygon, placed_pieces: PlacedPiecesIndex, max_y: Optional[float] = None):
+        """Busca la posición bottom-left factible para una pieza normalizada.
+        
+        Solo se evalúan como candidatos las esquinas del IFR, los vértices de
+        los NFP y las intersecciones entre sus bordes (y con el IFR). La
+        búsqueda se limita a las posiciones a menos de una altura de pieza
+        bajo la envolvente del bin o dentro de sus huecos (``SkylineDomain``),
+        y no más altas que la mejor caída sobre la envolvente ni que
+        ``max_y``; solo se calculan los NFP de las piezas colocadas que
+        alcanzan esa región.
+        """
+        ifr = self.compute_ifr(piece)
+        if ifr is None:
+            return None
+        ifr_minx, ifr_miny, ifr_maxx, ifr_maxy = ifr
+        if max_y is not None and max_y < ifr_miny:
+            return None
+        if not placed_pieces:
+            return (ifr_minx, ifr_miny)
+        
+        # La caída más baja sobre la envolvente siempre es factible y acota la búsqueda
+        tol = self.nfp_tolerance
+        _, _, width, height = piece.bounds
+        skyline = placed_pieces.skyline(self.bin_width, self.search_step)
+        drop_xs, drop_ys = skyline.drop_positions(_profile_cache.get(piece, skyline.step))
+        fits = (drop_xs + width <= self.bin_width + tol) & (drop_ys + height <= self.bin_height)
+        drop = None
+        limit = ifr_maxy if max_y is None else min(max_y, ifr_maxy)
+        if fits.any():
+            candidates = np.flatnonzero(fits)
+            first = candidates[np.lexsort((drop_xs[candidates], drop_ys[candidates]))[0]]
+            if drop_ys[first] <= limit:
+                drop = (float(drop_xs[first]), float(drop_ys[first]))
+                limit = drop[1]
+        
+        # Solo los NFP que alcanzan el IFR y el dominio restringen la posición;
+        # la caja del NFP se conoce sin calcularlo (suma de Minkowski de las cajas)
+        domain = SkylineDomain(skyline, width, height, limit, tol)
+        bounds = np.asarray(placed_pieces.bounds).reshape(-1, 4)
+        reach = ((bounds[:, 2] >= ifr_minx - tol) & (bounds[:, 0] - width <= ifr_maxx + tol) &
+                 (bounds[:, 3] >= ifr_miny - tol) & (bounds[:, 1] - height <= ifr_maxy + tol) &
+                 domain.reaches(bounds))
+        nfps = [self.compute_nfp(placed_pieces.polygons[idx], piece) for idx in np.flatnonzero(reach)]
+        
+        ifr_ring = LineString([
+            (ifr_minx, ifr_miny), (ifr_maxx, ifr_miny),
+            (ifr_maxx, ifr_maxy), (ifr_minx, ifr_maxy),
+            (ifr_minx, ifr_miny)
+        ])
+        boundaries = [nfp.boundary for nfp in nfps] + [ifr_ring]
+        
+        # Candidatos: vértices + intersecciones de bordes
+        candidate_parts = [
+            np.array([[ifr_minx, ifr_miny], [ifr_maxx, ifr_miny], [ifr_minx, ifr_maxy], [ifr_maxx, ifr_maxy]]),
+            shapely.get_coordinates(nfps).reshape(-1, 2)
+        ]
+        tree = shapely.STRtree(boundaries)
+        left, right = tree.query(boundaries, predicate='intersects')
+        pairs = left < right
+        if pairs.any():
+            crossings = shapely.intersection(
+                np.asarray(boundaries, dtype=object)[left[pairs]],
+                tree.geometries[right[pairs]]
+            )
+            candidate_parts.append(shapely.get_coordinates(crossings))
+        candidates = np.concatenate(candidate_parts)
+        
+        # Descartar candidatos fuera del IFR o del dominio y ordenar bottom-left
+        xs, ys = candidates[:, 0], candidates[:, 1]
+        inside = ((xs >= ifr_minx - tol) & (xs <= ifr_maxx + tol) &
+                  (ys >= ifr_miny - tol) & (ys <= ifr_maxy + tol))
+        xs = np.clip(xs[inside], ifr_minx, ifr_maxx)
+        ys = np.clip(ys[inside], ifr_miny, ifr_maxy)
+        inside = domain.contains(xs, ys)
+        xs, ys = xs[inside], ys[inside]
+        order = np.lexsort((xs, ys))
+        xs, ys = xs[order], ys[order]
+        
+        # Un candidato es factible si no cae en el interior de ningún NFP
+        # (el borde significa contacto sin solape)
+        forbidden = unary_union(nfps)
+        blocked = shapely.contains_xy(forbidden, xs, ys)
+        if blocked.any():
+            on_edge = shapely.distance(forbidden.boundary, shapely.points(xs[blocked], ys[blocked])) <= tol
+            blocked[np.flatnonzero(blocked)[on_edge]] = False
+        
+        # El NFP está redondeado a la escala de Clipper: cada candidato se
+        # confirma con la geometría exacta y si falla se pasa al siguiente
+        for index in np.flatnonzero(~blocked):
+            x, y = float(xs[index]), float(ys[index])
+            if drop is not None and (y, x) >= (drop[1], drop[0]):
+                break
+            if self.can_place_piece(piece, x, y, placed_pieces):
+                return (x, y)
+        return drop
+    
+    def create_index(self) -> PlacedPiecesIndex:
+        """Crea un índice espacial vacío para las piezas de un bin"""
+        cell_size = max(self.bin_width, self.bin_height) / 16
+        if self.collision_backend == "sat":
+            return ConvexCollisionIndex(cell_size)
+        return PlacedPiecesIndex(cell_size)
+    
+    def initial_bins(self, create_index: Optional[Callable] = None) -> List[PlacedPiecesIndex]:
+        """Bins con los que arranca una colocación: uno por lista de ``preplaced``"""
+        create_index = create_index or self.create_index
+        bins = []
+        for polygons in self.preplaced:
+            placed_pieces = create_index()
+            for polygon in polygons:
+                placed_pieces.insert(polygon)
+            bins.append(placed_pieces)
+        return bins
+    
+    def can_place_piece(self, piece: Polygon, x: float, y: float, placed_pieces: PlacedPiecesIndex) -> bool:
+        """Verifica si una pieza puede ser colocada en la posición dada.
+        
+        ``placed_pieces`` es el índice espacial del bin; también se acepta una
+        lista de polígonos. Tocar el borde de otra pieza está permitido.
+        """
+        # Verificar que esté dentro del bin antes de construir la geometría
+        minx, miny, maxx, maxy = piece.bounds
+        if (minx + x < 0 or miny + y < 0 or
+                maxx + x > self.bin_width or maxy + y > self.bin_height):
             return False
         
-        # Verificar colisiones con piezas ya colocadas
-        for placed in placed_pieces:
-            if translated_piece.overlaps(placed) or translated_piece.touches(placed):
-                return False
+        if not isinstance(placed_pieces, PlacedPiecesIndex):
+            placed_pieces = PlacedPiecesIndex.from_polygons(placed_pieces)
         
-        return True
+        # Verificar colisiones solo con las piezas vecinas
+        with self.profiler.phase("collision"):
+            return not placed_pieces.collides_at(piece, x, y)
     
     def is_within_bin(self, piece: Polygon) -> bool:
         """Verifica si la pieza está completamente dentro del bin"""
@@ -118,197 +351,1029 @@ class NestingEngine:
         return (bounds[0] >= 0 and bounds[1] >= 0 and 
                 bounds[2] <= self.bin_width and bounds[3] <= self.bin_height)
     
-    def bottom_left_fit(self, pieces: List[Polygon]) -> List[Tuple[float, float, float]]:
-        """Algoritmo Bottom-Left Fit"""
-        placed_pieces = []
-        positions = []
+    def rotations(self) -> List[float]:
+        """Rotaciones permitidas según rotation_step"""
+        return [float(r) for r in np.arange(0, 360, self.rotation_step)]
+    
+    def as_instances(self, pieces: List) -> List[PieceInstance]:
+        """Convierte polígonos sueltos en instancias de plantillas de piezas"""
+        return instances_from_polygons(pieces, self.rotations())
+    
+    def configure_search(self, pieces: List[PieceInstance]):
+        """Deriva la resolución de búsqueda de las dimensiones del bin y las piezas.
         
-        for piece in pieces:
-            best_pos = None
-            best_y = float('inf')
-            best_x = float('inf')
+        La pasada gruesa usa un paso de 1/64 del lado mayor del bin, sin
+        superar media pieza (la más chica) ni bajar de 1/1024 del bin. El
+        refinamiento llega hasta ``position_tolerance`` (por defecto 1/8 del
+        paso grueso).
+        """
+        bin_side = max(self.bin_width, self.bin_height)
+        step = bin_side / 64
+        sides = [min(b[2] - b[0], b[3] - b[1]) for b in (piece.polygon.bounds for piece in pieces)]
+        sides = [side for side in sides if side > 0]
+        if sides:
+            step = min(step, min(sides) / 2)
+        step = max(step, bin_side / 1024)
+        
+        # Una tolerancia no positiva haría infinita la bisección de flush_position
+        tolerance = max(self.position_tolerance or step / 8, bin_side * 1e-9)
+        self.search_step = max(step, tolerance)
+        self.search_tolerance = min(tolerance, self.search_step)
+    
+    def flush_position(self, piece: Polygon, x: float, y: float,
+                       placed_pieces: PlacedPiecesIndex) -> Tuple[float, float]:
+        """Empuja una posición factible hacia abajo y a la izquierda.
+        
+        Bisecciona hasta ``search_tolerance`` dentro de dos pasos gruesos, de
+        modo que la pieza quede pegada a sus vecinas en vez de a la grilla.
+        """
+        reach = 2 * self.search_step
+        for axis in (1, 0, 1):
+            position = [x, y]
+            feasible = position[axis]
+            low = max(feasible - reach, 0.0)
+            position[axis] = low
+            if low < feasible and self.can_place_piece(piece, position[0], position[1], placed_pieces):
+                feasible = low
+            while feasible - low > self.search_tolerance:
+                middle = (low + feasible) / 2
+                position[axis] = middle
+                if self.can_place_piece(piece, position[0], position[1], placed_pieces):
+                    feasible = middle
+                else:
+                    low = middle
+            position[axis] = feasible
+            x, y = position
+        return (x, y)
+    
+    def scan_position(self, piece: Polygon, placed_pieces: PlacedPiecesIndex, step: Optional[float] = None,
+                      max_y: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        """Primera posición factible bottom-left con paso ``step`` (pasada gruesa).
+        
+        Los candidatos salen del skyline del bin: la pieza se deja caer sobre
+        la envolvente en cada columna (posiciones sin solape por construcción)
+        y se prueban los huecos conocidos debajo de ella. El costo no depende
+        de cuánto del bin ya está ocupado.
+        """
+        step = step or self.search_step
+        minx, miny, maxx, maxy = piece.bounds
+        width, height = maxx - minx, maxy - miny
+        skyline = placed_pieces.skyline(self.bin_width, step)
+        
+        xs, ys = skyline.drop_positions(_profile_cache.get(piece, step))
+        fits = (xs + width <= self.bin_width + self.nfp_tolerance) & (ys + height <= self.bin_height)
+        if max_y is not None:
+            fits &= ys <= max_y
+        best = None
+        if fits.any():
+            candidates = np.flatnonzero(fits)
+            first = candidates[np.lexsort((xs[candidates], ys[candidates]))[0]]
+            best = (float(xs[first]), float(ys[first]))
+        
+        # Huecos bajo piezas colocadas, pegados a la izquierda o a la derecha
+        holes = []
+        for start, stop, y, ceiling in skyline.holes:
+            if stop - start + self.nfp_tolerance < width or ceiling - y + self.nfp_tolerance < height:
+                continue
+            for x in (start, stop - width):
+                if best is None or (y, x) < (best[1], best[0]):
+                    holes.append((y, x))
+        for y, x in sorted(holes):
+            if max_y is not None and y > max_y:
+                break
+            if self.can_place_piece(piece, x - minx, y - miny, placed_pieces):
+                return (x - minx, y - miny)
+        
+        if best is None:
+            return None
+        return (best[0] - minx, best[1] - miny)
+    
+    def bottom_left_position(self, piece: PieceInstance, placed_pieces: PlacedPiecesIndex) -> Optional[Tuple]:
+        """Mejor posición bottom-left de una pieza en un bin, probando rotaciones.
+        
+        Retorna (x, y, rotación, polígono colocado) o None si no cabe.
+        """
+        best = None
+        
+        for rotation in self.rotations():
+            rotated_piece = piece.variant(rotation).polygon
+            
+            # Solo interesan posiciones que no estén más arriba que la mejor
+            position = self.scan_position(rotated_piece, placed_pieces,
+                                          max_y=best[1] if best else None)
+            if position is None:
+                continue
+            
+            x, y = position
+            if best is None or (y, x) < (best[1], best[0]):
+                best = (x, y, rotation, rotated_piece)
+            if best[1] == 0:
+                break
+        
+        if best is None:
+            return None
+        x, y, rotation, rotated_piece = best
+        x, y = self.flush_position(rotated_piece, x, y, placed_pieces)
+        return (x, y, rotation, translate(rotated_piece, x, y))
+    
+    def best_fit_position(self, piece: PieceInstance, placed_pieces: PlacedPiecesIndex) -> Optional[Tuple]:
+        """Mejor posición según puntaje entre todos los candidatos y rotaciones.
+        
+        Los candidatos de todas las rotaciones (caídas sobre el skyline) se
+        puntúan en lote por altura final, área perdida bajo la pieza y largo
+        de contacto con la envolvente y las paredes del bin. Los huecos
+        conocidos se verifican con el test exacto solo si pueden mejorar el
+        mejor puntaje. Retorna (x, y, rotación, polígono colocado) o None.
+        """
+        height_weight, waste_weight, contact_weight = BEST_FIT_WEIGHTS
+        step = self.search_step
+        skyline = placed_pieces.skyline(self.bin_width, step)
+        
+        scores, xs, ys, variants = [], [], [], []
+        for rotation in self.rotations():
+            variant = piece.variant(rotation)
+            x, y, contact, waste = skyline.drop_metrics(_profile_cache.get(variant.polygon, step))
+            fits = (x + variant.width <= self.bin_width + self.nfp_tolerance) & (y + variant.height <= self.bin_height)
+            if not fits.any():
+                continue
+            x, y, contact, waste = x[fits], y[fits], contact[fits], waste[fits]
+            
+            # Las paredes del bin también cuentan como contacto
+            contact = (contact + variant.height * (x <= self.nfp_tolerance) +
+                       variant.height * (x + variant.width >= self.bin_width - self.nfp_tolerance))
+            perimeter = 2 * (variant.width + variant.height)
+            scores.append(height_weight * (y + variant.height) / self.bin_height +
+                          waste_weight * waste / max(variant.area, self.nfp_tolerance) -
+                          contact_weight * contact / perimeter)
+            xs.append(x)
+            ys.append(y)
+            variants.extend([variant] * len(x))
+        
+        best = None
+        if scores:
+            scores, xs, ys = np.concatenate(scores), np.concatenate(xs), np.concatenate(ys)
+            first = int(np.lexsort((xs, ys, scores))[0])
+            best = (float(scores[first]), float(xs[first]), float(ys[first]), variants[first])
+        
+        # Un hueco sin desperdicio ni contacto solo gana por altura
+        for start, stop, y, ceiling in skyline.holes:
+            for rotation in self.rotations():
+                variant = piece.variant(rotation)
+                score = height_weight * (y + variant.height) / self.bin_height
+                if (stop - start + self.nfp_tolerance < variant.width or ceiling - y + self.nfp_tolerance < variant.height
+                        or (best is not None and score >= best[0])):
+                    continue
+                if self.can_place_piece(variant.polygon, start, y, placed_pieces):
+                    best = (score, start, y, variant)
+        
+        if best is None:
+            return None
+        _, x, y, variant = best
+        x, y = self.flush_position(variant.polygon, x, y, placed_pieces)
+        return (x, y, variant.rotation, translate(variant.polygon, x, y))
+    
+    def nfp_position(self, piece: PieceInstance, placed_pieces: PlacedPiecesIndex) -> Optional[Tuple]:
+        """Mejor posición bottom-left usando NFP, probando rotaciones.
+        
+        Retorna (x, y, rotación, polígono colocado) o None si no cabe.
+        """
+        best = None
+        
+        for rotation in self.rotations():
+            rotated_piece = piece.variant(rotation).polygon
+            
+            # Las rotaciones siguientes solo buscan posiciones que puedan mejorar
+            position = self.find_nfp_position(rotated_piece, placed_pieces, None if best is None else best[1])
+            if position is None:
+                continue
             
-            # Probar diferentes rotaciones
-            for rotation in np.arange(0, 360, self.rotation_step):
-                rotated_piece = self.rotate_polygon(piece, rotation)
-                rotated_piece = self.normalize_polygon(rotated_piece)
+            x, y = position
+            if best is None or (y, x) < (best[1], best[0]):
+                best = (x, y, rotation, rotated_piece)
+        
+        if best is None:
+            return None
+        x, y, rotation, rotated_piece = best
+        return (x, y, rotation, translate(rotated_piece, x, y))
+    
+    def multi_bin_fit(self, pieces: List[PieceInstance], find_position: Callable,
+                      max_bins: Optional[int] = None,
+                      create_index: Optional[Callable] = None) -> List[Optional[Placement]]:
+        """Coloca las piezas en una sola pasada manteniendo todos los bins abiertos.
+        
+        Cada pieza va al primer bin abierto donde ``find_position`` encuentre
+        lugar; solo se abre un bin nuevo cuando no cabe en ninguno. Retorna
+        una colocación (bin, x, y, rotación) por pieza, o None si no se pudo
+        colocar. ``create_index`` crea el índice de cada bin nuevo. Los bins
+        de ``preplaced`` empiezan abiertos y cuentan para ``max_bins``.
+        """
+        pieces = self.as_instances(pieces)
+        create_index = create_index or self.create_index
+        bins = self.initial_bins(create_index)
+        placements = []
+        bin_area = self.bin_width * self.bin_height
+        
+        profiler = self.profiler
+        
+        for index, piece in enumerate(pieces):
+            self.report_progress(index / len(pieces))
+            with profiler.phase("bin_iteration"):
+                placement = None
                 
-                # Probar posiciones bottom-left
-                for y in np.arange(0, self.bin_height, 5):
-                    for x in np.arange(0, self.bin_width, 5):
-                        if self.can_place_piece(rotated_piece, x, y, placed_pieces):
-                            if y < best_y or (y == best_y and x < best_x):
-                                best_y = y
-                                best_x = x
-                                best_pos = (x, y, rotation)
-                            break
-                    if best_pos and best_y == y:
+                for bin_index, placed_pieces in enumerate(bins):
+                    # Descartar bins sin área libre suficiente
+                    if placed_pieces.area + piece.area > bin_area + self.nfp_tolerance:
+                        continue
+                    with profiler.phase("candidates"):
+                        result = find_position(piece, placed_pieces)
+                    if result is not None:
+                        placement = (bin_index, result)
                         break
                 
-                if best_pos and best_y == 0:
+                if placement is None and (max_bins is None or len(bins) < max_bins):
+                    placed_pieces = create_index()
+                    with profiler.phase("candidates"):
+                        result = find_position(piece, placed_pieces)
+                    if result is not None:
+                        if bins:
+                            # Se abre un bin nuevo: publicar el layout parcial
+                            self.report_layout(placements + [None] * (len(pieces) - index), {
+                                'pieces_processed': index,
+                                'bins_opened': len(bins)
+                            })
+                        bins.append(placed_pieces)
+                        placement = (len(bins) - 1, result)
+                
+                if placement is None:
+                    # No se pudo colocar la pieza
+                    placements.append(None)
+                    continue
+                
+                bin_index, (x, y, rotation, final_piece) = placement
+                bins[bin_index].insert(final_piece)
+                placements.append((bin_index, x, y, rotation))
+        
+        return placements
+    
+    def compact_layout(self, pieces: List[PieceInstance],
+                       placements: List[Optional[Placement]]) -> List[Optional[Placement]]:
+        """Valida y compacta un layout con la geometría exacta de las piezas.
+        
+        Pensado para layouts armados con aproximaciones (``PartVariant.polygon``):
+        en cada bin, de abajo hacia arriba, la pieza exacta se verifica en su
+        posición y se empuja hacia abajo y a la izquierda contra las demás.
+        Una pieza que no pasa la verificación queda sin colocar.
+        """
+        members = {}
+        for i, placement in enumerate(placements):
+            if placement is not None:
+                members.setdefault(placement[0], []).append(i)
+        
+        compacted = list(placements)
+        cell_size = max(self.bin_width, self.bin_height) / 16
+        for bin_index, indexes in members.items():
+            placed_pieces = PlacedPiecesIndex(cell_size)
+            slots = {}
+            for i in indexes:
+                _, x, y, rotation = placements[i]
+                slots[i] = len(placed_pieces)
+                placed_pieces.insert(translate(pieces[i].variant(rotation).exact, x, y))
+            
+            for i in sorted(indexes, key=lambda i: (placements[i][2], placements[i][1])):
+                self.check_cancelled()
+                _, x, y, rotation = placements[i]
+                exact = pieces[i].variant(rotation).exact
+                placed_pieces.remove(slots[i])
+                if not self.can_place_piece(exact, x, y, placed_pieces):
+                    compacted[i] = None
+                    continue
+                x, y = self.flush_position(exact, x, y, placed_pieces)
+                placed_pieces.insert(translate(exact, x, y))
+                compacted[i] = (bin_index, x, y, rotation)
+        return compacted
+    
+    def create_raster_index(self) -> RasterIndex:
+        """Crea un índice vacío con mapa de ocupación para el modo raster"""
+        resolution = self.raster_resolution or max(self.bin_width, self.bin_height) / 256
+        return RasterIndex(max(self.bin_width, self.bin_height) / 16,
+                           self.bin_width, self.bin_height, resolution)
+    
+    def raster_mask(self, variant, placed_pieces: RasterIndex) -> Tuple[np.ndarray, np.ndarray]:
+        """Máscara de una variante y su espectro, calculados una sola vez"""
+        cached = self.raster_masks.get(id(variant))
+        if cached is None or cached[0] is not variant:
+            _, _, mask = rasterize(variant.polygon, placed_pieces.resolution)
+            cached = (variant, mask, placed_pieces.kernel(mask))
+            self.raster_masks[id(variant)] = cached
+        return cached[1], cached[2]
+    
+    def raster_position(self, piece: PieceInstance, placed_pieces: RasterIndex) -> Optional[Tuple]:
+        """Posición bottom-left sobre el mapa de ocupación, probando rotaciones.
+        
+        Todas las posiciones libres de cada rotación salen de una correlación;
+        se elige la fila más baja y luego la columna más a la izquierda.
+        Retorna (x, y, rotación, polígono colocado) o None si no cabe.
+        """
+        resolution = placed_pieces.resolution
+        best = None
+        
+        for rotation in self.rotations():
+            variant = piece.variant(rotation)
+            mask, kernel = self.raster_mask(variant, placed_pieces)
+            free = placed_pieces.free_positions(mask, kernel)
+            if free is None:
+                continue
+            
+            # El orden por filas ya es el orden bottom-left
+            for cell in np.flatnonzero(free):
+                row, col = divmod(int(cell), free.shape[1])
+                if best is not None and (row, col) >= (best[1], best[0]):
+                    break
+                x, y = col * resolution, row * resolution
+                if self.raster_exact_check and not self.can_place_piece(variant.polygon, x, y, placed_pieces):
+                    continue
+                best = (col, row, rotation, variant.polygon)
+                break
+            if best is not None and best[1] == 0:
+                break
+        
+        if best is None:
+            return None
+        col, row, rotation, rotated_piece = best
+        x, y = col * resolution, row * resolution
+        return (x, y, rotation, translate(rotated_piece, x, y))
+    
+    def bottom_left_fit(self, pieces: List[PieceInstance], max_bins: Optional[int] = None) -> List[Optional[Placement]]:
+        """Algoritmo Bottom-Left Fit"""
+        self.configure_search(self.as_instances(pieces))
+        return self.multi_bin_fit(pieces, self.bottom_left_position, max_bins)
+    
+    def best_fit(self, pieces: List[PieceInstance], max_bins: Optional[int] = None) -> List[Optional[Placement]]:
+        """Algoritmo Best-Fit: cada pieza va al candidato de menor puntaje"""
+        self.configure_search(self.as_instances(pieces))
+        return self.multi_bin_fit(pieces, self.best_fit_position, max_bins)
+    
+    def nfp_fit(self, pieces: List[PieceInstance], max_bins: Optional[int] = None) -> List[Optional[Placement]]:
+        """Algoritmo Bottom-Left basado en No-Fit Polygons"""
+        self.configure_search(self.as_instances(pieces))
+        return self.multi_bin_fit(pieces, self.nfp_position, max_bins)
+    
+    def raster_fit(self, pieces: List[PieceInstance], max_bins: Optional[int] = None) -> List[Optional[Placement]]:
+        """Algoritmo Bottom-Left sobre mapas de ocupación discretizados"""
+        return self.multi_bin_fit(pieces, self.raster_position, max_bins, self.create_raster_index)
+    
+    def decode_sequence(self, pieces: List[PieceInstance], individual,
+                        max_bins: Optional[int] = None) -> Tuple[List[Optional[Placement]], List[PlacedPiecesIndex]]:
+        """Decodifica un individuo colocando sus piezas en orden con rotación fija.
+        
+        Retorna las colocaciones (en el orden del individuo) y los bins usados.
+        Con ``decode_cache`` se retoma desde el prefijo más largo ya decodificado.
+        """
+        start = 0
+        bins = []
+        placements = []
+        if self.decode_cache is not None:
+            start, placements, bins = self.decode_cache.lookup(individual)
+        if start == 0:
+            bins = self.initial_bins()
+        bin_area = self.bin_width * self.bin_height
+        
+        for depth in range(start, len(individual)):
+            piece_idx, rotation = individual[depth]
+            if self.decode_cache is not None and depth > start and self.decode_cache.should_store(depth):
+                self.decode_cache.store(individual[:depth], placements, bins)
+            self.check_cancelled()
+            piece = pieces[piece_idx]
+            rotated_piece = piece.variant(rotation).polygon
+            
+            # Encontrar posición bottom-left en el primer bin con lugar
+            placement = None
+            for bin_index, placed_pieces in enumerate(bins):
+                if placed_pieces.area + piece.area > bin_area + self.nfp_tolerance:
+                    continue
+                with self.profiler.phase("candidates"):
+                    position = self.scan_position(rotated_piece, placed_pieces)
+                if position is not None:
+                    placement = (bin_index, position)
                     break
             
-            if best_pos:
-                x, y, rotation = best_pos
-                final_piece = self.rotate_polygon(piece, rotation)
-                final_piece = self.normalize_polygon(final_piece)
-                final_piece = translate(final_piece, x, y)
-                placed_pieces.append(final_piece)
-                positions.append((x, y, rotation))
+            if placement is None and (max_bins is None or len(bins) < max_bins):
+                placed_pieces = self.create_index()
+                with self.profiler.phase("candidates"):
+                    position = self.scan_position(rotated_piece, placed_pieces)
+                if position is not None:
+                    bins.append(placed_pieces)
+                    placement = (len(bins) - 1, position)
+            
+            if placement is None:
+                placements.append(None)
+                continue
+            
+            bin_index, (x, y) = placement
+            x, y = self.flush_position(rotated_piece, x, y, bins[bin_index])
+            bins[bin_index].insert(translate(rotated_piece, x, y))
+            placements.append((bin_index, x, y, rotation))
+        
+        return placements, bins
+    
+    def evaluate_sequence(self, pieces: List[PieceInstance], individual, max_bins: Optional[int] = None) -> Tuple[float]:
+        """Evalúa la aptitud de un individuo (secuencia de piezas con rotaciones)"""
+        if self.decode_cache is not None:
+            fitness = self.decode_cache.get_fitness(individual)
+            if fitness is not None:
+                return fitness
+            fitness, _ = self._sequence_fitness(pieces, individual, max_bins)
+            self.decode_cache.put_fitness(individual, fitness)
+            return fitness
+        return self._sequence_fitness(pieces, individual, max_bins)[0]
+    
+    def evaluate_individual(self, pieces: List[PieceInstance], individual,
+                            max_bins: Optional[int] = None) -> Tuple[Tuple[float], Optional[List[Optional[Placement]]]]:
+        """Evalúa un individuo y retorna (fitness, colocaciones en el orden original).
+        
+        Las colocaciones son None cuando el fitness sale del cache de genomas
+        y no hubo que decodificar.
+        """
+        if self.decode_cache is not None:
+            fitness = self.decode_cache.get_fitness(individual)
+            if fitness is not None:
+                return fitness, None
+        fitness, placements = self._sequence_fitness(pieces, individual, max_bins)
+        if self.decode_cache is not None:
+            self.decode_cache.put_fitness(individual, fitness)
+        return fitness, self._original_order(pieces, individual, placements)
+    
+    def _sequence_fitness(self, pieces: List[PieceInstance], individual,
+                          max_bins: Optional[int]) -> Tuple[Tuple[float], List[Optional[Placement]]]:
+        """Decodifica un individuo y retorna (fitness, colocaciones en el orden del individuo)"""
+        with self.profiler.phase("decode"):
+            placements, bins = self.decode_sequence(pieces, individual, max_bins)
+        unplaced = sum(1 for placement in placements if placement is None)
+        
+        if not bins:
+            return (1000000,), placements
+        
+        # Fitness: primero piezas colocadas, luego bins usados y por último
+        # la altura del bin menos ocupado (para poder vaciarlo)
+        fitness = (unplaced * self.bin_height * (len(pieces) + 1) +
+                   (len(bins) - 1) * self.bin_height +
+                   min(placed_pieces.max_y for placed_pieces in bins))
+        return (fitness,), placements
+    
+    def genetic_algorithm(self, pieces: List[PieceInstance], generations: Optional[int] = 50, population_size: int = 30,
+                          workers: Optional[int] = None, max_bins: Optional[int] = None) -> List[Optional[Placement]]:
+        """Algoritmo genético para optimización de nesting.
+        
+        Con ``workers`` > 1 el fitness de cada generación se evalúa en un
+        ProcessPoolExecutor; las piezas se envían a cada proceso una sola vez
+        al inicializarlo. Los procesos se limitan a ``NESTING_MAX_GA_WORKERS``
+        (por defecto la cantidad de CPUs).
+        
+        La evolución termina al agotar ``generations`` (None = sin límite),
+        al alcanzar ``deadline``, tras ``max_stall_generations`` sin mejora o
+        cuando el mejor individuo usa la cota inferior de bins por área. El
+        motivo queda en ``stop_reason``. Con ``seed`` la ejecución es
+        reproducible.
+        """
+        if not pieces:
+            return []
+        pieces = self.as_instances(pieces)
+        self.prepare_genetic(pieces)
+        if generations is None and self.deadline is None and self.max_stall_generations is None:
+            generations = 50
+        
+        toolbox = self.genetic_toolbox(pieces)
+        executor = None
+        workers = min(workers or 1, process_limit("NESTING_MAX_GA_WORKERS"))
+        batch_size = 1
+        if workers > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_ga_worker,
+                initargs=(self.worker_settings(), pieces, max_bins)
+            )
+            chunksize = max(1, population_size // (workers * 4))
+            batch_size = workers * chunksize  # Una porción por proceso entre controles de deadline
+            toolbox.register("evaluate", _evaluate_in_worker)
+            toolbox.register("map", executor.map, chunksize=chunksize)
+        else:
+            toolbox.register("evaluate", self.evaluate_individual, pieces, max_bins=max_bins)
+        
+        decode = lambda individual: self._individual_placements(pieces, individual, max_bins)
+        try:
+            best_individual, placements = self._evolve(toolbox, generations, population_size,
+                                                       self.target_fitness(pieces), decode, batch_size=batch_size)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.count_decode_cache()
+        
+        # Solo se decodifica de nuevo si el mejor salió del cache de genomas
+        return placements if placements is not None else decode(best_individual)
+    
+    def island_genetic_algorithm(self, pieces: List[PieceInstance], islands: int, generations: Optional[int] = 50,
+                                 population_size: int = 30, max_bins: Optional[int] = None,
+                                 migration_interval: int = 5, migrants: int = 2) -> List[Optional[Placement]]:
+        """Algoritmo genético con modelo de islas.
+        
+        Cada isla es una población independiente en su propio proceso. Cada
+        ``migration_interval`` generaciones envía sus ``migrants`` mejores
+        individuos a la isla siguiente (en anillo) y reemplaza sus peores por
+        los que recibe de la anterior. La migración es sincrónica, así que con
+        ``seed`` y generaciones fijas la ejecución es reproducible. Retorna el
+        mejor individuo de todas las islas.
+        
+        Las islas se limitan a ``NESTING_MAX_ISLANDS`` (por defecto la
+        cantidad de CPUs); con una sola se usa ``genetic_algorithm``.
+        """
+        islands = min(islands, process_limit("NESTING_MAX_ISLANDS"))
+        if islands < 2 or not pieces:
+            return self.genetic_algorithm(pieces, generations=generations, population_size=population_size,
+                                          max_bins=max_bins)
+        pieces = self.as_instances(pieces)
+        self.prepare_genetic(pieces)
+        if generations is None and self.deadline is None and self.max_stall_generations is None:
+            generations = 50
+        options = {
+            'generations': generations,
+            'population_size': population_size,
+            'max_bins': max_bins,
+            'migration_interval': max(1, migration_interval),
+            'migrants': max(1, min(migrants, population_size - 1)),
+            'deadline': self.deadline,
+            'max_stall_generations': self.max_stall_generations,
+            'seed': self.seed,
+            'islands': islands
+        }
+        
+        best_fitness = None
+        progress = [0.0] * islands
+        with multiprocessing.Manager() as manager:
+            inboxes = [manager.Queue() for _ in range(islands)]
+            reports = manager.Queue()
+            cancel = manager.Event()
+            finished = manager.Event()
+            with ProcessPoolExecutor(max_workers=islands) as executor:
+                futures = [
+                    executor.submit(_run_island, self.worker_settings(), pieces, options, island,
+                                    inboxes, reports, cancel, finished)
+                    for island in range(islands)
+                ]
+                pending = set(futures)
+                while pending:
+                    _, pending = wait(pending, timeout=0.1)
+                    if self.should_stop is not None and self.should_stop():
+                        cancel.set()
+                    
+                    # Reenviar avances y layouts mejores publicados por las islas
+                    while not reports.empty():
+                        kind, island, payload = reports.get()
+                        if kind == "progress":
+                            progress[island] = payload
+                            self.report_progress(sum(progress) / islands)
+                        elif best_fitness is None or payload[1]['fitness'] < best_fitness:
+                            placements, metrics = payload
+                            best_fitness = metrics['fitness']
+                            self.report_layout(placements, dict(metrics, island=island))
+                results = [future.result() for future in futures]
+        
+        # El mejor individuo entre todas las islas (a igual fitness, la primera)
+        fitness, genes, placements, _ = min(results, key=lambda result: result[0])
+        reasons = [reason for _, _, _, reason in results]
+        self.stop_reason = "lower_bound" if "lower_bound" in reasons else reasons[0]
+        if placements is not None:
+            return placements
+        return self._individual_placements(pieces, genes, max_bins)
+    
+    def simulated_annealing(self, pieces: List[PieceInstance], iterations: Optional[int] = 400,
+                            max_bins: Optional[int] = None) -> List[Optional[Placement]]:
+        """Recocido simulado sobre la secuencia de piezas con rotaciones.
+        
+        Parte de la secuencia por área decreciente y aplica movimientos de
+        intercambio y de rotación. Cada vecino se decodifica solo desde la
+        primera posición que cambió: ``decode_cache`` retoma desde el último
+        prefijo guardado. La temperatura baja geométricamente con las
+        iteraciones o con el tiempo de ``deadline``.
+        
+        Se detiene al agotar ``iterations`` (None = sin límite), al llegar a
+        ``deadline``, tras ``max_stall_generations`` × n movimientos sin
+        mejora o al alcanzar la cota inferior de bins.
+        """
+        if not pieces:
+            return []
+        pieces = self.as_instances(pieces)
+        self.prepare_genetic(pieces)
+        if iterations is None and self.deadline is None and self.max_stall_generations is None:
+            iterations = 400
+        rng = self.rng
+        rotations = self.rotations()
+        target_fitness = self.target_fitness(pieces)
+        max_stall = self.max_stall_generations * len(pieces) if self.max_stall_generations is not None else None
+        decode = lambda sequence: self._individual_placements(pieces, sequence, max_bins)
+        
+        # Las posiciones de los movimientos tienen densidad creciente hacia el
+        # final (la mitad cae en el último 30 %): el vecino se decodifica solo
+        # desde el primer gen que cambia y así reutiliza prefijos más largos
+        tail_position = lambda: min(len(pieces) - 1, int(len(pieces) * math.sqrt(rng.random())))
+        
+        order = sorted(range(len(pieces)), key=lambda i: -pieces[i].area)
+        current = [(i, rotations[0]) for i in order]
+        current_fitness = self.evaluate_sequence(pieces, current, max_bins)[0]
+        best, best_fitness = list(current), current_fitness
+        self._report_annealing(best, best_fitness, 0, decode)
+        
+        start_temperature = 0.1 * self.bin_height
+        end_temperature = 0.001 * self.bin_height
+        started = time.monotonic()
+        iteration = 0
+        stall = 0
+        while True:
+            if best_fitness <= target_fitness:
+                self.stop_reason = "lower_bound"
+                break
+            if iterations is not None and iteration >= iterations:
+                self.stop_reason = "completed"
+                break
+            now = time.monotonic()
+            if self.deadline is not None and now >= self.deadline:
+                self.stop_reason = "time_limit"
+                break
+            if max_stall is not None and stall >= max_stall:
+                self.stop_reason = "stalled"
+                break
+            
+            # Avance según iteraciones o tiempo disponible
+            if iterations:
+                progress = iteration / iterations
+            elif self.deadline is not None:
+                progress = min(1.0, (now - started) / max(self.deadline - started, 1e-9))
+            else:
+                progress = 0.0
+            if iteration % 10 == 0:
+                self.report_progress(progress)
+            temperature = start_temperature * (end_temperature / start_temperature) ** progress
+            
+            # Vecino: intercambio de dos piezas o cambio de rotación
+            candidate = list(current)
+            if len(candidate) > 1 and (len(rotations) == 1 or rng.random() < 0.5):
+                i = tail_position()
+                j = tail_position()
+                while j == i:
+                    j = tail_position()
+                candidate[i], candidate[j] = candidate[j], candidate[i]
             else:
-                # No se pudo colocar la pieza
-                positions.append((0, 0, 0))
+                i = tail_position()
+                candidate[i] = (candidate[i][0], rng.choice(rotations))
+            
+            fitness = self.evaluate_sequence(pieces, candidate, max_bins)[0]
+            delta = fitness - current_fitness
+            if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                current, current_fitness = candidate, fitness
+            
+            iteration += 1
+            if current_fitness < best_fitness - 1e-9:
+                best, best_fitness = list(current), current_fitness
+                stall = 0
+                self._report_annealing(best, best_fitness, iteration, decode)
+            else:
+                stall += 1
         
-        return positions
+        self.count_decode_cache()
+        return decode(best)
+    
+    def _report_annealing(self, sequence, fitness: float, iteration: int, decode: Callable):
+        """Publica la mejor secuencia del recocido si hay alguien escuchando"""
+        if self.layout_callback is None:
+            return
+        self.report_layout(decode(sequence), {
+            'iteration': iteration,
+            'fitness': fitness
+        })
+    
+    def prepare_genetic(self, pieces: List[PieceInstance]):
+        """Prepara el motor para una ejecución genética nueva"""
+        self.configure_search(pieces)
+        self.decode_cache = create_decode_cache()
+        self.rng = random.Random(self.seed)
     
-    def genetic_algorithm(self, pieces: List[Polygon], generations: int = 50, population_size: int = 30) -> List[Tuple[float, float, float]]:
-        """Algoritmo genético para optimización de nesting"""
+    def count_decode_cache(self):
+        """Suma al perfil los aciertos del cache de decodificación de la ejecución"""
+        if self.decode_cache is None:
+            return
+        stats = self.decode_cache.stats()
+        self.profiler.count("decode_prefix_hits", stats['prefix_hits'])
+        self.profiler.count("decode_genes_skipped", stats['genes_skipped'])
+        self.profiler.count("fitness_cache_hits", stats['fitness_hits'])
+    
+    def target_fitness(self, pieces: List[PieceInstance]) -> float:
+        """Fitness de la cota inferior de bins por área: con esa cantidad no se puede mejorar.
+        
+        Las piezas que no entran en el bin con ninguna rotación quedan siempre
+        sin colocar: no suman área a la cota y sí su penalización.
+        """
+        tol = self.nfp_tolerance
+        rotations = self.rotations()
+        fitting_area = 0.0
+        unplaceable = 0
+        for piece in pieces:
+            if any(variant.width <= self.bin_width + tol and variant.height <= self.bin_height + tol
+                   for variant in map(piece.variant, rotations)):
+                fitting_area += piece.area
+            else:
+                unplaceable += 1
+        bin_area = self.bin_width * self.bin_height
+        lower_bound_bins = max(1, math.ceil(fitting_area / bin_area - 1e-9))
+        return (unplaceable * self.bin_height * (len(pieces) + 1) +
+                lower_bound_bins * self.bin_height)
+    
+    def genetic_toolbox(self, pieces: List[PieceInstance]) -> base.Toolbox:
+        """Toolbox de DEAP con los operadores genéticos (sin ``evaluate``).
+        
+        Todos los operadores usan ``self.rng`` en lugar del módulo ``random``.
+        """
+        rng = self.rng
+        rotations = self.rotations()
         
         def create_individual():
             """Crea un individuo aleatorio (secuencia de piezas con rotaciones)"""
             individual = []
             for i in range(len(pieces)):
-                rotation = random.choice(list(np.arange(0, 360, self.rotation_step)))
+                rotation = rng.choice(rotations)
                 individual.append((i, rotation))
-            random.shuffle(individual)
+            rng.shuffle(individual)
             return creator.Individual(individual)
         
-        def evaluate_individual(individual):
-            """Evalúa la aptitud de un individuo"""
-            placed_pieces = []
-            total_area = 0
-            placed_count = 0
-            
-            for piece_idx, rotation in individual:
-                piece = pieces[piece_idx]
-                rotated_piece = self.rotate_polygon(piece, rotation)
-                rotated_piece = self.normalize_polygon(rotated_piece)
-                
-                # Encontrar mejor posición usando bottom-left
-                best_pos = None
-                for y in np.arange(0, self.bin_height, 10):
-                    for x in np.arange(0, self.bin_width, 10):
-                        if self.can_place_piece(rotated_piece, x, y, placed_pieces):
-                            best_pos = (x, y)
-                            break
-                    if best_pos:
-                        break
-                
-                if best_pos:
-                    x, y = best_pos
-                    final_piece = translate(rotated_piece, x, y)
-                    placed_pieces.append(final_piece)
-                    total_area += piece.area
-                    placed_count += 1
-            
-            # Fitness: maximizar piezas colocadas y minimizar altura usada
-            if placed_count == 0:
-                return (1000000,)
-            
-            max_y = max([p.bounds[3] for p in placed_pieces]) if placed_pieces else 0
-            fitness = (len(pieces) - placed_count) * 1000 + max_y
-            return (fitness,)
-        
         def mutate_individual(individual):
             """Muta un individuo"""
-            if random.random() < 0.5:
+            if rng.random() < 0.5:
                 # Cambiar rotación
-                idx = random.randint(0, len(individual) - 1)
+                idx = rng.randint(0, len(individual) - 1)
                 piece_idx, _ = individual[idx]
-                new_rotation = random.choice(list(np.arange(0, 360, self.rotation_step)))
+                new_rotation = rng.choice(rotations)
                 individual[idx] = (piece_idx, new_rotation)
             else:
                 # Intercambiar orden
                 if len(individual) > 1:
-                    i, j = random.sample(range(len(individual)), 2)
+                    i, j = rng.sample(range(len(individual)), 2)
                     individual[i], individual[j] = individual[j], individual[i]
             return individual,
         
         def crossover_individuals(ind1, ind2):
-            """Cruza dos individuos"""
+            """Cruce ordenado: conserva un tramo de cada padre y completa con el
+            otro en su orden, así cada pieza aparece una sola vez"""
             size = min(len(ind1), len(ind2))
             if size > 1:
-                cx_point = random.randint(1, size - 1)
-                ind1[cx_point:], ind2[cx_point:] = ind2[cx_point:], ind1[cx_point:]
+                a, b = sorted(rng.sample(range(size + 1), 2))
+                parent1, parent2 = list(ind1), list(ind2)
+                for child, keep, other in ((ind1, parent1, parent2), (ind2, parent2, parent1)):
+                    kept = {piece_idx for piece_idx, _ in keep[a:b]}
+                    rest = [gene for gene in other if gene[0] not in kept]
+                    child[:] = rest[:a] + keep[a:b] + rest[a:]
             return ind1, ind2
         
+        def select_tournament(individuals, k, tournsize=3):
+            """Selección por torneo con el generador de la ejecución"""
+            return [max((rng.choice(individuals) for _ in range(tournsize)), key=lambda ind: ind.fitness)
+                    for _ in range(k)]
+        
         # Configurar DEAP
         toolbox = base.Toolbox()
         toolbox.register("individual", create_individual)
         toolbox.register("population", tools.initRepeat, list, toolbox.individual)
         toolbox.register("mate", crossover_individuals)
         toolbox.register("mutate", mutate_individual)
-        toolbox.register("select", tools.selTournament, tournsize=3)
-        toolbox.register("evaluate", evaluate_individual)
+        toolbox.register("select", select_tournament, tournsize=3)
+        return toolbox
+    
+    def _individual_placements(self, pieces: List[PieceInstance], individual,
+                               max_bins: Optional[int]) -> List[Optional[Placement]]:
+        """Decodifica un individuo y retorna las colocaciones en el orden original"""
+        placements, _ = self.decode_sequence(pieces, individual, max_bins)
+        return self._original_order(pieces, individual, placements)
+    
+    @staticmethod
+    def _original_order(pieces: List[PieceInstance], individual,
+                        placements: List[Optional[Placement]]) -> List[Optional[Placement]]:
+        """Reordena las colocaciones de un individuo al orden original de las piezas"""
+        original_placements = [None] * len(pieces)
+        for (piece_idx, _), placement in zip(individual, placements):
+            original_placements[piece_idx] = placement
+        return original_placements
+    
+    def _evolve(self, toolbox, generations: Optional[int], population_size: int, target_fitness: float,
+                decode: Optional[Callable] = None, migrate: Optional[Callable] = None, batch_size: int = 1):
+        """Ejecuta el ciclo evolutivo y retorna (mejor individuo, colocaciones).
         
-        # Ejecutar algoritmo genético
+        ``toolbox.evaluate`` retorna (fitness, colocaciones o None). Las
+        colocaciones del mejor individuo se conservan para no decodificarlo
+        otra vez; son None si su fitness salió del cache de genomas.
+        ``decode`` convierte un individuo en colocaciones para publicar cada
+        mejora con ``report_layout`` cuando no están guardadas.
+        ``migrate(generación, población)`` se llama tras cada generación y
+        puede retornar un motivo para detenerse. Las evaluaciones se hacen de
+        a ``batch_size`` individuos revisando ``deadline`` entre tandas.
+        """
         population = toolbox.population(n=population_size)
+        hall_of_fame = tools.HallOfFame(1)
+        best = [None, None]  # genoma del mejor y sus colocaciones
+        
+        def track_best(decoded: dict) -> bool:
+            """Actualiza el mejor individuo; retorna True si cambió"""
+            hall_of_fame.update(population)
+            genome = tuple(hall_of_fame[0])
+            if genome == best[0]:
+                return False
+            best[0], best[1] = genome, decoded.get(genome)
+            return True
         
-        # Evaluar población inicial
-        fitnesses = list(map(toolbox.evaluate, population))
-        for ind, fit in zip(population, fitnesses):
-            ind.fitness.values = fit
+        # Evaluar población inicial; si se agota el tiempo quedan solo los evaluados
+        decoded, complete = self._evaluate_batches(toolbox, population, batch_size)
+        if not complete:
+            population[:] = [ind for ind in population if ind.fitness.valid]
+        track_best(decoded)
+        best_fitness = hall_of_fame[0].fitness.values[0]
+        self._report_best(hall_of_fame[0], 0, decode, best[1])
         
         # Evolución
-        for generation in range(generations):
-            # Selección
-            offspring = toolbox.select(population, len(population))
-            offspring = list(map(toolbox.clone, offspring))
+        generation = 0
+        stall = 0
+        while True:
+            if not complete:
+                self.stop_reason = "time_limit"
+                break
+            if best_fitness <= target_fitness:
+                self.stop_reason = "lower_bound"
+                break
+            if generations is not None and generation >= generations:
+                self.stop_reason = "completed"
+                break
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                self.stop_reason = "time_limit"
+                break
+            if self.max_stall_generations is not None and stall >= self.max_stall_generations:
+                self.stop_reason = "stalled"
+                break
             
-            # Cruzamiento y mutación
-            for child1, child2 in zip(offspring[::2], offspring[1::2]):
-                if random.random() < 0.7:  # Probabilidad de cruzamiento
-                    toolbox.mate(child1, child2)
-                    del child1.fitness.values
-                    del child2.fitness.values
+            self.report_progress(self._generation_progress(generation, generations))
             
-            for mutant in offspring:
-                if random.random() < 0.2:  # Probabilidad de mutación
-                    toolbox.mutate(mutant)
-                    del mutant.fitness.values
-            
-            # Evaluar individuos con fitness inválido
-            invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
-            fitnesses = map(toolbox.evaluate, invalid_ind)
-            for ind, fit in zip(invalid_ind, fitnesses):
-                ind.fitness.values = fit
-            
-            population[:] = offspring
-        
-        # Obtener mejor individuo
-        best_individual = tools.selBest(population, 1)[0]
-        
-        # Convertir mejor individuo a posiciones
-        positions = []
-        placed_pieces = []
-        
-        for piece_idx, rotation in best_individual:
-            piece = pieces[piece_idx]
-            rotated_piece = self.rotate_polygon(piece, rotation)
-            rotated_piece = self.normalize_polygon(rotated_piece)
+            with self.profiler.phase("ga_generation"):
+                # Selección
+                offspring = toolbox.select(population, len(population))
+                offspring = list(map(toolbox.clone, offspring))
+                
+                # Cruzamiento y mutación
+                for child1, child2 in zip(offspring[::2], offspring[1::2]):
+                    if self.rng.random() < 0.7:  # Probabilidad de cruzamiento
+                        toolbox.mate(child1, child2)
+                        del child1.fitness.values
+                        del child2.fitness.values
+                
+                for mutant in offspring:
+                    if self.rng.random() < 0.2:  # Probabilidad de mutación
+                        toolbox.mutate(mutant)
+                        del mutant.fitness.values
+                
+                # Evaluar individuos con fitness inválido
+                invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
+                decoded, complete = self._evaluate_batches(toolbox, invalid_ind, batch_size)
+                if not complete:
+                    # Se agotó el tiempo: se conservan los hijos ya evaluados
+                    offspring = [ind for ind in offspring if ind.fitness.valid]
+                
+                population[:] = offspring
+            generation += 1
             
-            # Encontrar mejor posición
-            best_pos = None
-            for y in np.arange(0, self.bin_height, 5):
-                for x in np.arange(0, self.bin_width, 5):
-                    if self.can_place_piece(rotated_piece, x, y, placed_pieces):
-                        best_pos = (x, y)
-                        break
-                if best_pos:
+            if complete and migrate is not None:
+                reason = migrate(generation, population)
+                if reason is not None:
+                    self.stop_reason = reason
                     break
             
-            if best_pos:
-                x, y = best_pos
-                final_piece = translate(rotated_piece, x, y)
-                placed_pieces.append(final_piece)
-                positions.append((x, y, rotation))
+            # Seguimiento del mejor individuo para detectar estancamiento
+            track_best(decoded)
+            if hall_of_fame[0].fitness.values[0] < best_fitness - 1e-9:
+                best_fitness = hall_of_fame[0].fitness.values[0]
+                stall = 0
+                self._report_best(hall_of_fame[0], generation, decode, best[1])
             else:
-                positions.append((0, 0, 0))
+                stall += 1
         
-        # Reordenar posiciones según índices originales
-        original_positions = [None] * len(pieces)
-        for i, (piece_idx, rotation) in enumerate(best_individual):
-            if i < len(positions):
-                original_positions[piece_idx] = positions[i]
+        # Obtener mejor individuo
+        return hall_of_fame[0], best[1]
+    
+    def _evaluate_batches(self, toolbox, individuals: List, batch_size: int) -> Tuple[dict, bool]:
+        """Evalúa individuos de a tandas hasta terminar o llegar a ``deadline``.
+        
+        Retorna (colocaciones por genoma, si se evaluaron todos). La primera
+        tanda se evalúa siempre, así siempre hay un mejor individuo.
+        """
+        decoded = {}
+        batch_size = max(1, batch_size)
+        for start in range(0, len(individuals), batch_size):
+            if start and self.deadline is not None and time.monotonic() >= self.deadline:
+                return decoded, False
+            batch = individuals[start:start + batch_size]
+            for ind, (fitness, placements) in zip(batch, toolbox.map(toolbox.evaluate, batch)):
+                ind.fitness.values = fitness
+                if placements is not None:
+                    decoded[tuple(ind)] = placements
+        return decoded, True
+    
+    def _report_best(self, individual, generation: int, decode: Optional[Callable],
+                     placements: Optional[List[Optional[Placement]]] = None):
+        """Publica el mejor individuo si hay alguien escuchando"""
+        if self.layout_callback is None or (decode is None and placements is None):
+            return
+        self.report_layout(placements if placements is not None else decode(individual), {
+            'generation': generation,
+            'fitness': individual.fitness.values[0]
+        })
+    
+    def _generation_progress(self, generation: int, generations: Optional[int]) -> float:
+        """Avance estimado según generaciones o tiempo disponible"""
+        if generations:
+            return generation / generations
+        if self.deadline is not None:
+            budget = self.deadline - self.started_at
+            return min(1.0, (time.monotonic() - self.started_at) / budget) if budget > 0 else 1.0
+        return 0.0
+
+
+# Estado por proceso para la evaluación paralela del algoritmo genético.
+# Se inicializa una vez por worker para no serializar las piezas con cada
+# individuo.
+_worker_engine = None
+_worker_pieces = None
+_worker_max_bins = None
+
+def _init_ga_worker(settings: dict, pieces: List[PieceInstance], max_bins: Optional[int] = None):
+    """Inicializa el motor y las piezas de un proceso worker"""
+    global _worker_engine, _worker_pieces, _worker_max_bins
+    _worker_engine = NestingEngine(**settings)
+    _worker_engine.configure_search(pieces)
+    _worker_engine.decode_cache = create_decode_cache()
+    _worker_pieces = pieces
+    _worker_max_bins = max_bins
+
+def _evaluate_in_worker(individual) -> Tuple[Tuple[float], Optional[List[Optional[Placement]]]]:
+    """Evalúa un individuo con el estado del proceso worker"""
+    return _worker_engine.evaluate_individual(_worker_pieces, individual, _worker_max_bins)
+
+def _run_island(settings: dict, pieces: List[PieceInstance], options: dict, island: int,
+                inboxes: List, reports, cancel, finished) -> Tuple[float, List, Optional[List], str]:
+    """Evoluciona una isla del modelo de islas en un proceso worker.
+    
+    Retorna (fitness, genes del mejor individuo, sus colocaciones o None,
+    motivo de parada). Al terminar avisa a la isla siguiente para que no
+    la espere más.
+    """
+    engine = NestingEngine(**settings)
+    if options['seed'] is not None:
+        engine.seed = f"{options['seed']}-{island}"
+    engine.deadline = options['deadline']
+    engine.max_stall_generations = options['max_stall_generations']
+    engine.should_stop = cancel.is_set
+    engine.progress_callback = lambda progress: reports.put(("progress", island, progress))
+    engine.layout_callback = lambda placements, metrics: reports.put(("layout", island, (placements, metrics)))
+    engine.prepare_genetic(pieces)
+    
+    max_bins = options['max_bins']
+    toolbox = engine.genetic_toolbox(pieces)
+    toolbox.register("evaluate", engine.evaluate_individual, pieces, max_bins=max_bins)
+    
+    islands = options['islands']
+    outbox = inboxes[(island + 1) % islands]
+    inbox = inboxes[island]
+    neighbour_done = False
+    
+    def migrate(generation, population):
+        nonlocal neighbour_done
+        if finished.is_set():
+            return "lower_bound"
+        if generation % options['migration_interval'] or islands < 2:
+            return None
         
-        return [pos if pos else (0, 0, 0) for pos in original_positions]
\ No newline at end of file
+        # Enviar los mejores y reemplazar los peores por los que llegan
+        ranked = sorted(population, key=lambda ind: ind.fitness, reverse=True)
+        outbox.put([list(ind) for ind in ranked[:options['migrants']]])
+        if neighbour_done:
+            return None
+        incoming = inbox.get()
+        if incoming is None:
+            neighbour_done = True
+            return None
+        for target, genes in zip(ranked[::-1], incoming):
+            target[:] = [tuple(gene) for gene in genes]
+            target.fitness.values = toolbox.evaluate(target)[0]
+        return None
+    
+    try:
+        best, placements = engine._evolve(toolbox, options['generations'], options['population_size'],
+                              engine.target_fitness(pieces),
+                              lambda individual: engine._individual_placements(pieces, individual, max_bins),
+                              migrate)
+    finally:
+        outbox.put(None)
+    if engine.stop_reason == "lower_bound":
+        finished.set()
+    return best.fitness.values[0], list(best), placements, engine.stop_reason
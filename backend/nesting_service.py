@@ -1,39 +1,132 @@
 import time
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Callable, Optional
 from shapely.affinity import translate
 from models import NestingRequest, NestingResponse, PlacedPiece
 from nesting_engine import NestingEngine
+from part_templates import APPROXIMATIONS, PieceInstance, create_instances, get_template_cache
+from profiling import Profiler, get_metrics, profiling_enabled
+from rect_packer import pack_rectangles
+from result_cache import get_result_cache
+from utils import PolygonBatch
+
+# Algoritmos que optimizan el orden de todas las piezas: no usan el empaquetado de rectángulos
+ITERATIVE_ALGORITHMS = ("genetic", "annealing")
 
 class NestingService:
     def __init__(self):
         self.engine = None
+        self.include_points = True
+        self.profiler = None
     
-    def process_nesting_request(self, request: NestingRequest) -> NestingResponse:
-        """Procesa una solicitud de nesting y retorna la respuesta"""
+    def process_nesting_request(self, request: NestingRequest,
+                                progress_callback: Optional[Callable[[float], None]] = None,
+                                should_stop: Optional[Callable[[], bool]] = None,
+                                layout_callback: Optional[Callable[[NestingResponse, Dict], None]] = None) -> NestingResponse:
+        """Procesa una solicitud de nesting y retorna la respuesta.
+        
+        ``progress_callback`` recibe el avance global (0-1) y ``should_stop``
+        permite cancelar la ejecución (el motor lanza NestingCancelled).
+        ``layout_callback`` recibe cada layout mejor encontrado (con
+        ``stop_reason="running"``) junto con sus métricas.
+        
+        Con ``request.profile`` (o ``NESTING_PROFILE`` en el entorno) se
+        miden las fases del motor; el desglose va en ``response.profile``
+        solo si la solicitud lo pidió.
+        """
         start_time = time.time()
+        self.profiler = Profiler(enabled=request.profile or profiling_enabled())
+        
+        # Solicitudes equivalentes ya resueltas salen del cache
+        result_cache = get_result_cache() if request.use_cache else None
+        if result_cache is not None:
+            with self.profiler.phase("result_cache"):
+                cached = result_cache.get(request)
+            if cached is not None:
+                response = cached.model_copy(update={
+                    'cache_hit': True,
+                    'computation_time': time.time() - start_time
+                })
+                return self._finish(request, response)
+        
+        response = self._solve(request, start_time, progress_callback, should_stop, layout_callback)
         
+        if result_cache is not None:
+            result_cache.put(request, response.model_copy(update={'profile': None}))
+        return self._finish(request, response)
+    
+    def _finish(self, request: NestingRequest, response: NestingResponse) -> NestingResponse:
+        """Registra la solicitud en las métricas del proceso y adjunta el perfil pedido"""
+        metrics = get_metrics()
+        metrics.observe_solve(request.algorithm, response.computation_time, response.stop_reason)
+        metrics.merge(self.profiler)
+        return response.model_copy(update={'profile': self.profiler.summary() if request.profile else None})
+    
+    def _solve(self, request: NestingRequest, start_time: float,
+               progress_callback: Optional[Callable[[float], None]],
+               should_stop: Optional[Callable[[], bool]],
+               layout_callback: Optional[Callable[[NestingResponse, Dict], None]]) -> NestingResponse:
+        """Resuelve la solicitud con el motor de nesting"""
         # Inicializar motor de nesting
         self.engine = NestingEngine(
             request.bin_width, 
             request.bin_height, 
-            request.rotation_step
+            request.rotation_step,
+            collision_backend=request.collision_backend,
+            position_tolerance=request.position_tolerance
         )
+        self.engine.should_stop = should_stop
+        self.engine.progress_callback = progress_callback
+        if request.time_limit_ms is not None:
+            self.engine.deadline = time.monotonic() + request.time_limit_ms / 1000.0
+        self.engine.max_stall_generations = request.max_stall_generations
+        self.engine.seed = request.seed
+        self.engine.raster_resolution = request.raster_resolution
+        self.engine.raster_exact_check = request.raster_exact_check
+        self.engine.profiler = self.profiler
+        
+        # Los formatos compactos solo usan las transformaciones
+        self.include_points = request.response_format == "full"
+        
+        # Una plantilla por pieza distinta (compartida entre solicitudes); cada
+        # unidad de quantity es una instancia
+        rotations = self.engine.rotations()
+        templates = get_template_cache()
+        approximation = request.approximation if request.approximation in APPROXIMATIONS else None
+        tolerance = request.simplify_tolerance or max(request.bin_width, request.bin_height) / 1000
+        instances = []
         
-        # Convertir piezas a polígonos
-        polygons = []
-        piece_ids = []
+        # Los puntos de la solicitud se convierten a arreglos una sola vez
+        with self.profiler.phase("polygon_conversion"):
+            polygons = PolygonBatch.from_pieces(request.pieces).to_shapely()
         
-        for piece_data in request.pieces:
-            for _ in range(piece_data.quantity):
-                polygon = self.engine.points_to_polygon(piece_data.points)
-                polygon = self.engine.normalize_polygon(polygon)
-                polygons.append(polygon)
-                piece_ids.append(piece_data.id)
+        with self.profiler.phase("rotation"):
+            for piece_data, polygon in zip(request.pieces, polygons):
+                template = templates.get(piece_data.id, polygon, rotations, approximation, tolerance)
+                instances.extend(create_instances(template, piece_data.quantity))
+        
+        # Publicar layouts intermedios cuando el motor encuentra uno mejor
+        if layout_callback is not None:
+            self.engine.layout_callback = lambda placements, metrics: layout_callback(
+                self._build_response(instances, placements, start_time, "running"), metrics
+            )
         
         # Ejecutar nesting con múltiples bins
-        bins_data = self._nest_in_multiple_bins(request.algorithm, polygons, piece_ids)
+        with self.profiler.phase("solve"):
+            placements = self._nest_in_multiple_bins(request, instances)
+        
+        # El layout se armó con piezas aproximadas: validar y compactar con las exactas
+        if approximation is not None:
+            with self.profiler.phase("compaction"):
+                placements = self.engine.compact_layout(instances, placements)
+        
+        with self.profiler.phase("build_response"):
+            return self._build_response(instances, placements, start_time, self.engine.stop_reason or "completed")
+    
+    def _build_response(self, instances: List[PieceInstance], placements: List,
+                        start_time: float, stop_reason: str) -> NestingResponse:
+        """Crea la respuesta consolidada a partir de las colocaciones"""
+        bins_data, unplaced_piece_ids = self._group_into_bins(instances, placements)
         
-        # Crear respuesta consolidada
         all_placed_pieces = []
         total_utilization = 0
         bins_used = len(bins_data)
@@ -55,119 +148,148 @@ class NestingService:
             bins_used=bins_used,
             utilization=average_utilization,
             computation_time=computation_time,
-            bins_data=bins_data  # Información detallada por bin
+            bins_data=bins_data,  # Información detallada por bin
+            unplaced_pieces=unplaced_piece_ids,
+            stop_reason=stop_reason
         )
     
-    def _nest_in_multiple_bins(self, algorithm: str, polygons: List, piece_ids: List) -> Dict:
-        """Ejecuta nesting distribuyendo piezas en múltiples bins"""
+    def _nest_in_multiple_bins(self, request: NestingRequest, instances: List[PieceInstance]) -> List:
+        """Ejecuta nesting distribuyendo piezas en múltiples bins en una sola pasada.
+        
+        Con ``rectangle_fast_path`` y un algoritmo constructivo, los
+        rectángulos alineados a los ejes se empaquetan con MaxRects y solo
+        el resto pasa por el motor general, que arranca con esos bins.
+        Retorna una colocación (bin, x, y, rotación) o None por instancia.
+        """
+        if not request.rectangle_fast_path or request.algorithm in ITERATIVE_ALGORITHMS:
+            return self._execute_algorithm(request, instances)
+        
+        rectangles = [i for i, instance in enumerate(instances) if instance.template.is_rectangle]
+        if not rectangles:
+            return self._execute_algorithm(request, instances)
+        
+        rotations = self.engine.rotations()
+        allow_rotation = any(round(rotation) % 180 == 90 for rotation in rotations)
+        placements = [None] * len(instances)
+        preplaced = []
+        with self.profiler.phase("rectangles"):
+            packed = pack_rectangles(
+                [(instances[i].template.width, instances[i].template.height) for i in rectangles],
+                self.engine.bin_width, self.engine.bin_height, allow_rotation, request.max_bins
+            )
+            for i, placement in zip(rectangles, packed):
+                if placement is None:
+                    continue
+                bin_index, x, y, rotated = placement
+                # La variante a 90° del rectángulo normalizado es el mismo rectángulo girado
+                rotation = 90.0 if rotated else rotations[0]
+                placements[i] = (bin_index, x, y, rotation)
+                while len(preplaced) <= bin_index:
+                    preplaced.append([])
+                preplaced[bin_index].append(translate(instances[i].variant(rotation).polygon, x, y))
+        
+        # Piezas irregulares y rectángulos que no entraron van al motor general
+        rest = [i for i, placement in enumerate(placements) if placement is None]
+        if not rest:
+            return placements
+        
+        def merge(rest_placements: List) -> List:
+            merged = list(placements)
+            for i, placement in zip(rest, rest_placements):
+                merged[i] = placement
+            return merged
+        
+        layout_callback = self.engine.layout_callback
+        if layout_callback is not None:
+            self.engine.layout_callback = lambda rest_placements, metrics: layout_callback(merge(rest_placements), metrics)
+        self.engine.preplaced = preplaced
+        try:
+            return merge(self._execute_algorithm(request, [instances[i] for i in rest]))
+        finally:
+            self.engine.preplaced = []
+            self.engine.layout_callback = layout_callback
+    
+    def _group_into_bins(self, instances: List[PieceInstance], placements: List) -> Tuple[Dict, List[str]]:
+        """Agrupa las colocaciones por bin.
+        
+        Retorna la información por bin y los ids de las piezas que no se
+        pudieron colocar.
+        """
+        # Agrupar las piezas colocadas por bin
+        grouped = {}
+        unplaced_piece_ids = []
+        for instance, placement in zip(instances, placements):
+            if placement is None:
+                unplaced_piece_ids.append(instance.piece_id)
+                continue
+            bin_index, x, y, rotation = placement
+            bin_instances, bin_positions = grouped.setdefault(bin_index, ([], []))
+            bin_instances.append(instance)
+            bin_positions.append((x, y, rotation))
+        
         bins_data = {}
-        remaining_polygons = polygons.copy()
-        remaining_piece_ids = piece_ids.copy()
-        bin_counter = 1
-        
-        while remaining_polygons:
-            # Intentar colocar piezas en el bin actual
-            if algorithm == "genetic":
-                positions = self.engine.genetic_algorithm(remaining_polygons, generations=30)
-            elif algorithm == "bottom_left":
-                positions = self.engine.bottom_left_fit(remaining_polygons)
-            else:  # best_fit o default
-                positions = self.engine.bottom_left_fit(remaining_polygons)
-            
-            # Filtrar piezas que caben en el bin actual
-            fitted_polygons = []
-            fitted_positions = []
-            fitted_piece_ids = []
+        bin_area = self.engine.bin_width * self.engine.bin_height
+        for bin_id, bin_index in enumerate(sorted(grouped), start=1):
+            fitted_instances, fitted_positions = grouped[bin_index]
             
-            for i, (polygon, position) in enumerate(zip(remaining_polygons, positions)):
-                if self._piece_fits_in_bin(polygon, position):
-                    fitted_polygons.append(polygon)
-                    fitted_positions.append(position)
-                    fitted_piece_ids.append(remaining_piece_ids[i])
+            # Crear piezas colocadas para este bin
+            placed_pieces = self._create_placed_pieces(fitted_instances, fitted_positions)
             
-            # Si no cabe ninguna pieza más, intentar con las piezas restantes más pequeñas
-            if not fitted_polygons and remaining_polygons:
-                # Tomar la pieza más pequeña que quede
-                min_area_idx = min(range(len(remaining_polygons)), 
-                                 key=lambda i: remaining_polygons[i].area)
-                fitted_polygons = [remaining_polygons[min_area_idx]]
-                fitted_positions = [positions[min_area_idx] if min_area_idx < len(positions) 
-                                  else (0, 0, 0)]
-                fitted_piece_ids = [remaining_piece_ids[min_area_idx]]
+            # Calcular utilización del bin
+            total_area = sum(instance.area for instance in fitted_instances)
+            utilization = (total_area / bin_area) * 100 if bin_area > 0 else 0
             
-            if fitted_polygons:
-                # Crear piezas colocadas para este bin
-                placed_pieces = self._create_placed_pieces(
-                    fitted_polygons, fitted_positions, fitted_piece_ids
-                )
-                
-                # Calcular utilización del bin
-                total_area = sum(polygon.area for polygon in fitted_polygons)
-                bin_area = self.engine.bin_width * self.engine.bin_height
-                utilization = (total_area / bin_area) * 100 if bin_area > 0 else 0
-                
-                # Almacenar información del bin
-                bins_data[bin_counter] = {
-                    'placed_pieces': placed_pieces,
-                    'pieces_count': len(fitted_polygons),
-                    'utilization': utilization,
-                    'total_area': total_area
-                }
-                
-                # Remover piezas colocadas de las listas de pendientes
-                for i in sorted(range(len(remaining_polygons)), reverse=True):
-                    if i < len(fitted_polygons) and remaining_polygons[i] in fitted_polygons:
-                        remaining_polygons.pop(i)
-                        remaining_piece_ids.pop(i)
-                
-                bin_counter += 1
-            else:
-                # Si no se puede colocar ninguna pieza, salir del bucle
-                break
+            # Almacenar información del bin
+            bins_data[bin_id] = {
+                'placed_pieces': placed_pieces,
+                'pieces_count': len(fitted_instances),
+                'utilization': utilization,
+                'total_area': total_area
+            }
         
-        return bins_data
-    
-    def _piece_fits_in_bin(self, polygon, position: Tuple[float, float, float]) -> bool:
-        """Verifica si una pieza cabe en el bin con la posición dada"""
-        x, y, rotation = position
-        
-        # Aplicar transformaciones
-        transformed = self.engine.rotate_polygon(polygon, rotation)
-        transformed = self.engine.normalize_polygon(transformed)
-        transformed = translate(transformed, x, y)
-        
-        # Obtener límites del polígono transformado
-        minx, miny, maxx, maxy = transformed.bounds
-        
-        # Verificar si está dentro de los límites del bin
-        return (minx >= 0 and miny >= 0 and 
-                maxx <= self.engine.bin_width and 
-                maxy <= self.engine.bin_height)
+        return bins_data, unplaced_piece_ids
     
-    def _execute_algorithm(self, algorithm: str, polygons: List) -> List:
+    def _execute_algorithm(self, request: NestingRequest, polygons: List[PieceInstance]) -> List:
         """Ejecuta el algoritmo de nesting seleccionado"""
+        algorithm = request.algorithm
         if algorithm == "genetic":
-            return self.engine.genetic_algorithm(polygons, generations=30)
+            # Con presupuesto de tiempo las generaciones no tienen límite fijo
+            generations = None if request.time_limit_ms is not None else 30
+            if request.islands and request.islands > 1:
+                return self.engine.island_genetic_algorithm(polygons, request.islands, generations=generations,
+                                                            max_bins=request.max_bins,
+                                                            migration_interval=request.migration_interval)
+            return self.engine.genetic_algorithm(polygons, generations=generations, workers=request.workers,
+                                                 max_bins=request.max_bins)
+        elif algorithm == "annealing":
+            iterations = None if request.time_limit_ms is not None else 400
+            return self.engine.simulated_annealing(polygons, iterations=iterations, max_bins=request.max_bins)
         elif algorithm == "bottom_left":
-            return self.engine.bottom_left_fit(polygons)
-        else:  # best_fit o default
-            return self.engine.bottom_left_fit(polygons)
+            return self.engine.bottom_left_fit(polygons, request.max_bins)
+        elif algorithm == "best_fit":
+            return self.engine.best_fit(polygons, request.max_bins)
+        elif algorithm == "nfp":
+            return self.engine.nfp_fit(polygons, request.max_bins)
+        elif algorithm == "raster":
+            return self.engine.raster_fit(polygons, request.max_bins)
+        else:  # default
+            return self.engine.bottom_left_fit(polygons, request.max_bins)
     
-    def _create_placed_pieces(self, polygons: List, positions: List, piece_ids: List) -> List[PlacedPiece]:
+    def _create_placed_pieces(self, instances: List[PieceInstance], positions: List) -> List[PlacedPiece]:
         """Crea la lista de piezas colocadas con sus transformaciones"""
         placed_pieces = []
         
-        for i, (polygon, (x, y, rotation)) in enumerate(zip(polygons, positions)):
-            # Aplicar transformaciones
-            transformed = self.engine.rotate_polygon(polygon, rotation)
-            transformed = self.engine.normalize_polygon(transformed)
-            transformed = translate(transformed, x, y)
-            
-            # Convertir a formato de respuesta
-            points = self.engine.polygon_to_points(transformed)
+        for instance, (x, y, rotation) in zip(instances, positions):
+            points = []
+            if self.include_points:
+                # La variante rotada ya está normalizada; solo falta trasladarla
+                transformed = translate(instance.variant(rotation).exact, x, y)
+                
+                # Convertir a formato de respuesta
+                points = self.engine.polygon_to_points(transformed)
             
             placed_piece = PlacedPiece(
-                id=piece_ids[i],
+                id=instance.piece_id,
                 points=points,
                 x=x,
                 y=y,
@@ -176,7 +298,7 @@ class NestingService:
             placed_pieces.append(placed_piece)
         
         return placed_pieces
-
+    
     def get_bin_statistics(self, bins_data: Dict) -> Dict:
         """Retorna estadísticas detalladas de todos los bins"""
         if not bins_data:
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+class NFPCache:
+    """Cache LRU de No-Fit Polygons compartido por todo el proceso.
+    
+    Las claves son canónicas: se calculan sobre las piezas ya rotadas y
+    normalizadas al origen, así que el mismo par (pieza, rotación) comparte
+    entrada sin importar en qué solicitud o posición aparezca. El tamaño se
+    limita en bytes aproximados y opcionalmente se persiste en SQLite para
+    arrancar con el cache caliente.
+    """
+    
+    ENTRY_OVERHEAD = 200  # Bytes aproximados por entrada además de las coordenadas
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries = OrderedDict()  # clave -> (polígono, bytes)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS nfp (key TEXT PRIMARY KEY, wkb BLOB)")
+            self.db.commit()
+    
+    @staticmethod
+    def shape_key(polygon: Polygon, precision: int = 6) -> bytes:
+        """Clave canónica de una pieza, independiente de su traslación"""
+        coords = shapely.get_coordinates(polygon.exterior)
+        coords = np.round(coords - coords.min(axis=0), precision) + 0.0  # Evita -0.0
+        digest = hashlib.sha1(np.int64(len(coords)).tobytes())
+        digest.update(coords.tobytes())
+        return digest.digest()
+    
+    @staticmethod
+    def pair_key(stationary_key: bytes, moving_key: bytes) -> str:
+        """Clave de un par a partir de las claves de cada pieza"""
+        return hashlib.sha1(stationary_key + moving_key).hexdigest()
+    
+    @staticmethod
+    def make_key(stationary: Polygon, moving: Polygon, precision: int = 6) -> str:
+        """Clave canónica de un par de piezas normalizadas"""
+        return NFPCache.pair_key(NFPCache.shape_key(stationary, precision), NFPCache.shape_key(moving, precision))
+    
+    def get(self, key: str) -> Optional[Polygon]:
+        """Retorna el NFP almacenado o None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            
+            if self.db is not None:
+                row = self.db.execute("SELECT wkb FROM nfp WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    nfp = shapely.from_wkb(row[0])
+                    self._store(key, nfp)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return nfp
+            
+            self.misses += 1
+            return None
+    
+    def put(self, key: str, nfp: Polygon):
+        """Almacena un NFP, desalojando los menos usados si hace falta"""
+        with self.lock:
+            self._store(key, nfp)
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO nfp (key, wkb) VALUES (?, ?)",
+                                (key, shapely.to_wkb(nfp)))
+                self.db.commit()
+    
+    def clear(self):
+        """Vacía el cache en memoria y reinicia los contadores"""
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+            self.hits = self.misses = self.disk_hits = self.evictions = 0
+    
+    def stats(self) -> dict:
+        """Contadores de uso del cache"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'persistent': self.db is not None
+            }
+    
+    def _store(self, key: str, nfp: Polygon):
+        size = int(shapely.get_num_coordinates(nfp)) * 16 + self.ENTRY_OVERHEAD
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= previous[1]
+        self.entries[key] = (nfp, size)
+        self.current_bytes += size
+        
+        while self.current_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+class ShapeKeyCache:
+    """Claves canónicas de polígonos por identidad.
+    
+    Las variantes rotadas y las piezas colocadas son objetos que se consultan
+    muchas veces: su clave se calcula una sola vez en lugar de en cada
+    búsqueda de NFP.
+    """
+    
+    def __init__(self, max_entries: int = 8192):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, polygon: Polygon) -> bytes:
+        key = id(polygon)
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is not None and cached[0] is polygon:
+                self.entries.move_to_end(key)
+                return cached[1]
+        shape_key = NFPCache.shape_key(polygon)
+        with self.lock:
+            # Guarda el polígono para que su id no se reutilice
+            self.entries[key] = (polygon, shape_key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return shape_key
+
+_shape_keys = ShapeKeyCache()
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_nfp_cache() -> NFPCache:
+    """Retorna el cache de NFP del proceso, configurado por variables de entorno"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = NFPCache(
+                max_bytes=int(float(os.environ.get("NFP_CACHE_MAX_MB", 64)) * 1024 * 1024),
+                path=os.environ.get("NFP_CACHE_PATH") or None
+            )
+        return _shared_cache
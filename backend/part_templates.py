@@ -0,0 +1,202 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import shapely
+from shapely.geometry import Polygon, box
+from shapely.affinity import translate, rotate
+
+# Aproximaciones conservadoras de las piezas para la colocación gruesa
+APPROXIMATIONS = ("simplified", "hull")
+
+def _rotation_key(rotation: float) -> float:
+    return round(float(rotation), 6) % 360.0
+
+def approximate_polygon(polygon: Polygon, approximation: str, tolerance: float) -> Polygon:
+    """Polígono con menos vértices que contiene a ``polygon`` y tiene sus mismos bounds.
+    
+    "simplified" simplifica con ``tolerance`` y desplaza el resultado hacia
+    afuera esa misma distancia (Douglas-Peucker no se aleja más que eso del
+    original); "hull" usa la envolvente convexa. Se recorta a la bounding
+    box del original para que siga tocando las paredes del bin.
+    """
+    if approximation == "hull":
+        return polygon.convex_hull
+    if approximation != "simplified" or tolerance <= 0:
+        return polygon
+    
+    simplified = polygon.simplify(tolerance, preserve_topology=True)
+    for margin in (tolerance, 2 * tolerance):
+        approximated = simplified.buffer(margin, join_style="mitre", mitre_limit=2.0)
+        approximated = approximated.intersection(box(*polygon.bounds))
+        if (isinstance(approximated, Polygon) and
+                shapely.get_num_coordinates(approximated) < shapely.get_num_coordinates(polygon) and
+                approximated.buffer(tolerance * 1e-6).contains(polygon)):
+            return approximated
+    return polygon
+
+class PartVariant:
+    """Una pieza rotada y normalizada al origen, con sus datos precalculados.
+    
+    ``exact`` es la geometría real; ``polygon`` la que usan los algoritmos de
+    colocación, que puede ser una aproximación conservadora (ver
+    ``approximate_polygon``) o el mismo objeto que ``exact``.
+    """
+    
+    __slots__ = ('rotation', 'exact', 'polygon', 'bounds', 'width', 'height', 'area', 'hull')
+    
+    def __init__(self, polygon: Polygon, rotation: float, approximation: Optional[str] = None,
+                 tolerance: float = 0.0):
+        rotated = rotate(polygon, rotation, origin='centroid')
+        minx, miny, _, _ = rotated.bounds
+        self.rotation = rotation
+        self.exact = translate(rotated, -minx, -miny)
+        self.bounds = self.exact.bounds
+        self.width = self.bounds[2] - self.bounds[0]
+        self.height = self.bounds[3] - self.bounds[1]
+        self.area = self.exact.area
+        self.hull = self.exact.convex_hull
+        self.polygon = approximate_polygon(self.exact, approximation, tolerance) if approximation else self.exact
+
+class PartTemplate:
+    """Geometría única de una pieza con sus variantes de rotación.
+    
+    Se construye una vez por pieza distinta; todas las unidades de
+    ``quantity`` comparten las mismas variantes. Con ``approximation`` las
+    variantes se colocan con una aproximación conservadora de la pieza.
+    """
+    
+    def __init__(self, piece_id: str, polygon: Polygon, rotations: List[float],
+                 approximation: Optional[str] = None, tolerance: float = 0.0):
+        minx, miny, _, _ = polygon.bounds
+        self.piece_id = piece_id
+        self.approximation = approximation
+        self.tolerance = tolerance
+        self.polygon = translate(polygon, -minx, -miny)
+        self.area = self.polygon.area
+        _, _, self.width, self.height = self.polygon.bounds
+        # Un polígono con el área de su bounding box es un rectángulo alineado a los ejes
+        self.is_rectangle = abs(self.width * self.height - self.area) <= 1e-9 * max(self.width * self.height, 1.0)
+        self.variants: Dict[float, PartVariant] = {}
+        for rotation in rotations:
+            self.variant(rotation)
+    
+    def variant(self, rotation: float) -> PartVariant:
+        """Retorna la variante para una rotación, creándola si no existe"""
+        key = _rotation_key(rotation)
+        variant = self.variants.get(key)
+        if variant is None:
+            variant = PartVariant(self.polygon, rotation, self.approximation, self.tolerance)
+            self.variants[key] = variant
+        return variant
+
+class PieceInstance:
+    """Unidad concreta de una plantilla: (plantilla, índice de unidad)"""
+    
+    __slots__ = ('template', 'index')
+    
+    def __init__(self, template: PartTemplate, index: int):
+        self.template = template
+        self.index = index
+    
+    @property
+    def piece_id(self) -> str:
+        return self.template.piece_id
+    
+    @property
+    def polygon(self) -> Polygon:
+        return self.template.polygon
+    
+    @property
+    def area(self) -> float:
+        return self.template.area
+    
+    def variant(self, rotation: float) -> PartVariant:
+        return self.template.variant(rotation)
+
+def create_instances(template: PartTemplate, quantity: int) -> List[PieceInstance]:
+    """Crea las unidades de una plantilla"""
+    return [PieceInstance(template, i) for i in range(quantity)]
+
+def instances_from_polygons(polygons: List, rotations: List[float]) -> List[PieceInstance]:
+    """Convierte una lista de polígonos en instancias, agrupando geometrías iguales.
+    
+    Las instancias existentes se retornan sin cambios.
+    """
+    templates = {}
+    instances = []
+    for polygon in polygons:
+        if isinstance(polygon, PieceInstance):
+            instances.append(polygon)
+            continue
+        minx, miny, _, _ = polygon.bounds
+        key = translate(polygon, -minx, -miny).wkb
+        template = templates.get(key)
+        if template is None:
+            template = PartTemplate(str(len(templates)), polygon, rotations)
+            templates[key] = template
+            count = 0
+        else:
+            count = sum(1 for instance in instances if instance.template is template)
+        instances.append(PieceInstance(template, count))
+    return instances
+
+class TemplateCache:
+    """Plantillas ya construidas, compartidas entre solicitudes del proceso.
+    
+    La clave es (id de pieza, geometría, rotaciones): las solicitudes que
+    repiten piezas (por ejemplo las de un mismo lote) reutilizan las
+    variantes rotadas y, con ellas, los perfiles y máscaras cacheados por
+    identidad de polígono.
+    """
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+    
+    def get(self, piece_id: str, polygon: Polygon, rotations: List[float],
+            approximation: Optional[str] = None, tolerance: float = 0.0) -> PartTemplate:
+        """Retorna la plantilla de la pieza, creándola si no existe"""
+        key = (piece_id, polygon.wkb, tuple(_rotation_key(rotation) for rotation in rotations),
+               approximation, tolerance if approximation == "simplified" else 0.0)
+        with self.lock:
+            template = self.entries.get(key)
+            if template is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+        
+        template = PartTemplate(piece_id, polygon, rotations, approximation, tolerance)
+        with self.lock:
+            self.entries[key] = template
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return template
+    
+    def stats(self) -> dict:
+        """Contadores de uso del cache"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+_shared_templates = None
+_shared_templates_lock = threading.Lock()
+
+def get_template_cache() -> TemplateCache:
+    """Retorna el cache de plantillas del proceso, configurado por variables de entorno"""
+    global _shared_templates
+    with _shared_templates_lock:
+        if _shared_templates is None:
+            _shared_templates = TemplateCache(
+                max_entries=int(os.environ.get("PART_TEMPLATE_CACHE_SIZE", 4096))
+            )
+        return _shared_templates
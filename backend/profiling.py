@@ -0,0 +1,230 @@
+import bisect
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+# Cuantiles publicados del tiempo de resolución
+SOLVE_QUANTILES = (0.5, 0.9, 0.99)
+
+# Límites (segundos) del histograma de tiempo por fase y solicitud
+PHASE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class _NullPhase:
+    """Fase que no mide nada: se reutiliza cuando el perfilado está apagado"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 'started')
+    
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.started)
+        return False
+
+class Profiler:
+    """Contadores y tiempos por fase de una solicitud de nesting.
+    
+    Las fases se miden con ``with profiler.phase(nombre):`` y pueden estar
+    anidadas (los tiempos son inclusivos). Apagado, ``phase`` retorna un
+    contexto compartido que no mide nada, así el costo en los caminos
+    calientes es una llamada a método. No es seguro entre hilos: cada
+    solicitud usa el suyo y al terminar se acumula en ``get_metrics()``.
+    """
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.timings: Dict[str, List[float]] = {}  # fase -> [llamadas, segundos, máximo]
+        self.counters: Dict[str, float] = {}
+    
+    def phase(self, name: str):
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+    
+    def record(self, name: str, seconds: float):
+        """Registra una duración de la fase ``name``"""
+        entry = self.timings.get(name)
+        if entry is None:
+            self.timings[name] = [1, seconds, seconds]
+            return
+        entry[0] += 1
+        entry[1] += seconds
+        if seconds > entry[2]:
+            entry[2] = seconds
+    
+    def count(self, name: str, amount: float = 1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def summary(self) -> Dict:
+        """Desglose para la respuesta: llamadas y tiempos por fase y contadores"""
+        return {
+            'phases': {
+                name: {
+                    'calls': calls,
+                    'total_ms': round(total * 1000, 3),
+                    'mean_ms': round(total * 1000 / calls, 4),
+                    'max_ms': round(longest * 1000, 3)
+                }
+                for name, (calls, total, longest) in sorted(self.timings.items(), key=lambda item: -item[1][1])
+            },
+            'counters': dict(self.counters)
+        }
+
+# Perfilador apagado que usa el motor cuando nadie pidió perfilar
+NULL_PROFILER = Profiler(enabled=False)
+
+def profiling_enabled() -> bool:
+    """Indica si el entorno pide perfilar todas las solicitudes (NESTING_PROFILE)"""
+    return os.environ.get("NESTING_PROFILE", "").lower() in ("1", "true", "yes")
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_sample(name: str, labels: Dict, value: float) -> str:
+    if labels:
+        name += "{" + ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items()) + "}"
+    if isinstance(value, float) and math.isnan(value):
+        return f"{name} NaN"
+    return f"{name} {value}"
+
+def format_metric(name: str, kind: str, help_text: str, samples: List[Tuple[Dict, float]]) -> List[str]:
+    """Líneas en formato de texto de Prometheus para una métrica"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(_format_sample(name, labels, value) for labels, value in samples)
+    return lines
+
+def _histogram_buckets(name: str, histograms: List[Tuple[str, List[int]]]) -> List[str]:
+    """Líneas ``_bucket`` (acumuladas por ``le``) de un histograma por fase"""
+    lines = []
+    for phase, buckets in histograms:
+        cumulative = 0
+        for bound, count in zip(PHASE_BUCKETS + (math.inf,), buckets):
+            cumulative += count
+            labels = {'phase': phase, 'le': "+Inf" if math.isinf(bound) else bound}
+            lines.append(_format_sample(f"{name}_bucket", labels, cumulative))
+    return lines
+
+class MetricsRegistry:
+    """Métricas acumuladas del proceso para ``/metrics``.
+    
+    Registra cada solicitud resuelta (tiempo por algoritmo y motivo de
+    parada) y suma los perfiles de las solicitudes perfiladas; el tiempo
+    de cada fase por solicitud va además a un histograma con los límites
+    de ``PHASE_BUCKETS``. Los cuantiles del tiempo de resolución se
+    calculan sobre una ventana de las últimas ``window`` solicitudes de
+    cada algoritmo.
+    """
+    
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self.requests: Dict[Tuple[str, str], int] = {}  # (algoritmo, motivo) -> solicitudes
+        self.solve_times: Dict[str, deque] = {}  # algoritmo -> últimos tiempos
+        self.solve_totals: Dict[str, List[float]] = {}  # algoritmo -> [cantidad, segundos]
+        self.phases: Dict[str, List[float]] = {}  # fase -> [llamadas, segundos]
+        self.phase_buckets: Dict[str, List[int]] = {}  # fase -> solicitudes por intervalo (el último es +Inf)
+        self.counters: Dict[str, float] = {}
+        self.lock = threading.Lock()
+    
+    def observe_solve(self, algorithm: str, seconds: float, stop_reason: str):
+        """Registra una solicitud terminada"""
+        with self.lock:
+            key = (algorithm, stop_reason)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            times = self.solve_times.get(algorithm)
+            if times is None:
+                times = self.solve_times[algorithm] = deque(maxlen=self.window)
+            times.append(seconds)
+            totals = self.solve_totals.setdefault(algorithm, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+    
+    def merge(self, profiler: Profiler):
+        """Acumula el perfil de una solicitud"""
+        if not profiler.enabled:
+            return
+        with self.lock:
+            for name, (calls, total, _) in profiler.timings.items():
+                entry = self.phases.setdefault(name, [0, 0.0])
+                entry[0] += calls
+                entry[1] += total
+                buckets = self.phase_buckets.setdefault(name, [0] * (len(PHASE_BUCKETS) + 1))
+                buckets[bisect.bisect_left(PHASE_BUCKETS, total)] += 1
+            for name, amount in profiler.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def render(self) -> List[str]:
+        """Líneas de Prometheus con las métricas acumuladas"""
+        with self.lock:
+            requests = sorted(self.requests.items())
+            solve = {algorithm: (sorted(times), self.solve_totals[algorithm])
+                     for algorithm, times in self.solve_times.items()}
+            phases = sorted(self.phases.items())
+            histograms = sorted((name, list(buckets)) for name, buckets in self.phase_buckets.items())
+            counters = sorted(self.counters.items())
+        
+        quantiles = []
+        sums, counts = [], []
+        for algorithm, (times, (count, total)) in sorted(solve.items()):
+            for quantile in SOLVE_QUANTILES:
+                index = min(len(times) - 1, max(0, math.ceil(quantile * len(times)) - 1))
+                quantiles.append(({'algorithm': algorithm, 'quantile': quantile}, round(times[index], 6)))
+            sums.append(({'algorithm': algorithm}, round(total, 6)))
+            counts.append(({'algorithm': algorithm}, count))
+        
+        lines = format_metric(
+            "nesting_requests_total", "counter", "Solicitudes de nesting resueltas",
+            [({'algorithm': algorithm, 'stop_reason': reason}, count) for (algorithm, reason), count in requests]
+        )
+        lines += format_metric("nesting_solve_seconds", "summary",
+                               "Tiempo de resolución por algoritmo (cuantiles de las últimas solicitudes)",
+                               quantiles)
+        lines += [_format_sample("nesting_solve_seconds_sum", labels, value) for labels, value in sums]
+        lines += [_format_sample("nesting_solve_seconds_count", labels, value) for labels, value in counts]
+        lines += format_metric("nesting_phase_seconds_total", "counter",
+                               "Tiempo acumulado por fase en solicitudes perfiladas (inclusivo)",
+                               [({'phase': name}, round(total, 6)) for name, (_, total) in phases])
+        lines += format_metric("nesting_phase_seconds", "histogram",
+                               "Tiempo por fase y solicitud perfilada (inclusivo)", [])
+        lines += _histogram_buckets("nesting_phase_seconds", histograms)
+        lines += [_format_sample("nesting_phase_seconds_sum", {'phase': name}, round(total, 6))
+                  for name, (_, total) in phases]
+        lines += [_format_sample("nesting_phase_seconds_count", {'phase': name}, sum(buckets))
+                  for name, buckets in histograms]
+        lines += format_metric("nesting_phase_calls_total", "counter",
+                               "Llamadas por fase en solicitudes perfiladas",
+                               [({'phase': name}, calls) for name, (calls, _) in phases])
+        lines += format_metric("nesting_profile_events_total", "counter",
+                               "Contadores de solicitudes perfiladas",
+                               [({'name': name}, amount) for name, amount in counters])
+        return lines
+
+_shared_metrics = None
+_shared_metrics_lock = threading.Lock()
+
+def get_metrics() -> MetricsRegistry:
+    """Retorna el registro de métricas del proceso"""
+    global _shared_metrics
+    with _shared_metrics_lock:
+        if _shared_metrics is None:
+            _shared_metrics = MetricsRegistry(window=int(os.environ.get("NESTING_METRICS_WINDOW", 1024)))
+        return _shared_metrics
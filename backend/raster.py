@@ -0,0 +1,93 @@
+import math
+from typing import Optional, Tuple
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+from spatial_index import PlacedPiecesIndex
+
+# Fracción de celda que se ignora en los bordes para no marcar celdas que
+# solo tocan la pieza por errores de redondeo
+RASTER_TOLERANCE = 1e-6
+
+def rasterize(polygon: Polygon, resolution: float) -> Tuple[int, int, np.ndarray]:
+    """Discretiza un polígono en una grilla de celdas de lado ``resolution``.
+    
+    Es conservador: marca toda celda cuyo interior se solapa con la pieza.
+    Retorna (fila inicial, columna inicial, máscara booleana), donde las filas
+    crecen con y.
+    """
+    minx, miny, maxx, maxy = polygon.bounds
+    col0 = math.floor(minx / resolution + RASTER_TOLERANCE)
+    row0 = math.floor(miny / resolution + RASTER_TOLERANCE)
+    col1 = max(math.ceil(maxx / resolution - RASTER_TOLERANCE), col0 + 1)
+    row1 = max(math.ceil(maxy / resolution - RASTER_TOLERANCE), row0 + 1)
+    
+    shrink = resolution * RASTER_TOLERANCE
+    xs = np.arange(col0, col1) * resolution
+    ys = np.arange(row0, row1) * resolution
+    gx, gy = np.meshgrid(xs, ys)
+    cells = shapely.box(gx + shrink, gy + shrink, gx + resolution - shrink, gy + resolution - shrink)
+    
+    shapely.prepare(polygon)
+    mask = shapely.intersects(polygon, cells) & ~shapely.touches(polygon, cells)
+    return row0, col0, mask
+
+class RasterIndex(PlacedPiecesIndex):
+    """Índice de piezas colocadas con un mapa de ocupación del bin.
+    
+    Además de los polígonos (para verificaciones exactas) mantiene una grilla
+    booleana de ocupación. Todas las posiciones libres de una máscara se
+    obtienen con una sola correlación por FFT.
+    """
+    
+    def __init__(self, cell_size: float, bin_width: float, bin_height: float, resolution: float):
+        super().__init__(cell_size)
+        self.resolution = resolution
+        # Solo celdas completas, así toda posición de la grilla queda dentro del bin
+        rows = int(math.floor(bin_height / resolution + RASTER_TOLERANCE))
+        cols = int(math.floor(bin_width / resolution + RASTER_TOLERANCE))
+        self.occupancy = np.zeros((rows, cols), dtype=bool)
+        self._spectrum = None  # rfft2 de la ocupación, se invalida al insertar
+    
+    def insert(self, polygon: Polygon):
+        super().insert(polygon)
+        row0, col0, mask = rasterize(polygon, self.resolution)
+        rows, cols = self.occupancy.shape
+        r0, c0 = max(row0, 0), max(col0, 0)
+        r1, c1 = min(row0 + mask.shape[0], rows), min(col0 + mask.shape[1], cols)
+        if r0 < r1 and c0 < c1:
+            self.occupancy[r0:r1, c0:c1] |= mask[r0 - row0:r1 - row0, c0 - col0:c1 - col0]
+        self._spectrum = None
+    
+    def kernel(self, mask: np.ndarray) -> np.ndarray:
+        """Espectro de una máscara con la forma de la grilla (reutilizable entre bins)"""
+        return np.fft.rfft2(mask.astype(np.float64), s=self.occupancy.shape)
+    
+    def free_positions(self, mask: np.ndarray, kernel: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Posiciones (fila, columna) donde la máscara no toca celdas ocupadas.
+        
+        Retorna un arreglo booleano de forma (filas - alto + 1, columnas -
+        ancho + 1), o None si la máscara no cabe en la grilla. ``kernel`` es
+        el resultado precalculado de ``kernel(mask)``.
+        """
+        rows, cols = self.occupancy.shape
+        height, width = mask.shape
+        if height > rows or width > cols:
+            return None
+        if not len(self):
+            return np.ones((rows - height + 1, cols - width + 1), dtype=bool)
+        
+        # Correlación: celdas ocupadas cubiertas por la máscara en cada posición
+        if self._spectrum is None:
+            self._spectrum = np.fft.rfft2(self.occupancy.astype(np.float64))
+        if kernel is None:
+            kernel = self.kernel(mask)
+        overlap = np.fft.irfft2(self._spectrum * np.conj(kernel), s=(rows, cols))
+        return overlap[:rows - height + 1, :cols - width + 1] < 0.5
+    
+    def copy(self) -> "RasterIndex":
+        clone = super().copy()
+        clone.resolution = self.resolution
+        clone.occupancy = self.occupancy.copy()
+        clone._spectrum = self._spectrum
+        return clone
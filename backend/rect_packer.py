@@ -0,0 +1,120 @@
+from typing import List, Optional, Tuple
+import numpy as np
+
+# Holgura para comparar medidas de rectángulos
+RECT_TOLERANCE = 1e-9
+
+class MaxRectsBin:
+    """Bin para empaquetar rectángulos con la lista de rectángulos libres maximales.
+    
+    ``free`` es un arreglo (F, 4) de (x, y, ancho, alto) con todos los
+    rectángulos libres maximales. Cada inserción elige el que deja el lado
+    sobrante más corto (Best Short Side Fit), con desempate bottom-left,
+    y parte los rectángulos libres que se solapan con el colocado.
+    """
+    
+    def __init__(self, width: float, height: float):
+        self.width = width
+        self.height = height
+        self.free = np.array([[0.0, 0.0, width, height]])
+        self.used_area = 0.0
+    
+    def find(self, width: float, height: float, allow_rotation: bool) -> Optional[Tuple[float, float, bool]]:
+        """Mejor posición para un rectángulo: (x, y, rotado) o None si no entra"""
+        best = None
+        for rotated in ((False, True) if allow_rotation else (False,)):
+            w, h = (height, width) if rotated else (width, height)
+            leftover_w = self.free[:, 2] - w
+            leftover_h = self.free[:, 3] - h
+            fits = np.flatnonzero((leftover_w >= -RECT_TOLERANCE) & (leftover_h >= -RECT_TOLERANCE))
+            if not len(fits):
+                continue
+            short_side = np.minimum(leftover_w[fits], leftover_h[fits])
+            long_side = np.maximum(leftover_w[fits], leftover_h[fits])
+            first = fits[np.lexsort((self.free[fits, 0], self.free[fits, 1], long_side, short_side))[0]]
+            score = (min(leftover_w[first], leftover_h[first]), max(leftover_w[first], leftover_h[first]),
+                     self.free[first, 1], self.free[first, 0])
+            if best is None or score < best[0]:
+                best = (score, float(self.free[first, 0]), float(self.free[first, 1]), rotated)
+        if best is None:
+            return None
+        return best[1:]
+    
+    def place(self, x: float, y: float, width: float, height: float):
+        """Ocupa el rectángulo dado y actualiza la lista de libres"""
+        free = self.free
+        fx, fy, fw, fh = free[:, 0], free[:, 1], free[:, 2], free[:, 3]
+        overlaps = ((fx < x + width - RECT_TOLERANCE) & (fx + fw > x + RECT_TOLERANCE) &
+                    (fy < y + height - RECT_TOLERANCE) & (fy + fh > y + RECT_TOLERANCE))
+        if overlaps.any():
+            cut = free[overlaps]
+            cx, cy, cw, ch = cut[:, 0], cut[:, 1], cut[:, 2], cut[:, 3]
+            right, top = np.full_like(cx, x + width), np.full_like(cy, y + height)
+            # Hasta cuatro rectángulos maximales por cada libre cortado
+            pieces = np.concatenate([
+                np.column_stack([cx, cy, x - cx, ch]),                   # izquierda
+                np.column_stack([right, cy, cx + cw - right, ch]),       # derecha
+                np.column_stack([cx, cy, cw, y - cy]),                   # abajo
+                np.column_stack([cx, top, cw, cy + ch - top])            # arriba
+            ])
+            pieces = pieces[(pieces[:, 2] > RECT_TOLERANCE) & (pieces[:, 3] > RECT_TOLERANCE)]
+            free = np.concatenate([free[~overlaps], pieces])
+        self.free = self._prune(free)
+        self.used_area += width * height
+    
+    @staticmethod
+    def _prune(free: np.ndarray) -> np.ndarray:
+        """Descarta los rectángulos libres contenidos en otro (y los duplicados)"""
+        if len(free) < 2:
+            return free
+        x0, y0 = free[:, 0], free[:, 1]
+        x1, y1 = x0 + free[:, 2], y0 + free[:, 3]
+        # contained[i, j]: i está dentro de j
+        contained = ((x0[:, None] >= x0[None, :] - RECT_TOLERANCE) & (y0[:, None] >= y0[None, :] - RECT_TOLERANCE) &
+                     (x1[:, None] <= x1[None, :] + RECT_TOLERANCE) & (y1[:, None] <= y1[None, :] + RECT_TOLERANCE))
+        np.fill_diagonal(contained, False)
+        # De dos rectángulos iguales se conserva el de menor índice
+        equal = contained & contained.T
+        contained &= ~np.triu(equal)
+        return free[~contained.any(axis=1)]
+
+def pack_rectangles(sizes: List[Tuple[float, float]], bin_width: float, bin_height: float,
+                    allow_rotation: bool, max_bins: Optional[int] = None) -> List[Optional[Tuple[int, float, float, bool]]]:
+    """Empaqueta rectángulos (ancho, alto) en bins con MaxRects.
+    
+    Los rectángulos se ordenan por lado mayor y área decrecientes; cada uno
+    va al primer bin abierto donde entre y solo se abre uno nuevo cuando no
+    entra en ninguno. Retorna (bin, x, y, rotado) por rectángulo en el orden
+    recibido, o None si no se pudo colocar.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-max(sizes[i]), -sizes[i][0] * sizes[i][1]))
+    bins: List[MaxRectsBin] = []
+    placements = [None] * len(sizes)
+    bin_area = bin_width * bin_height
+    
+    for i in order:
+        width, height = sizes[i]
+        area = width * height
+        result = None
+        for bin_index, packed in enumerate(bins):
+            if packed.used_area + area > bin_area + RECT_TOLERANCE:
+                continue
+            position = packed.find(width, height, allow_rotation)
+            if position is not None:
+                result = (bin_index, position)
+                break
+        
+        if result is None and (max_bins is None or len(bins) < max_bins):
+            packed = MaxRectsBin(bin_width, bin_height)
+            position = packed.find(width, height, allow_rotation)
+            if position is not None:
+                bins.append(packed)
+                result = (len(bins) - 1, position)
+        
+        if result is None:
+            continue
+        bin_index, (x, y, rotated) = result
+        bins[bin_index].place(x, y, *((height, width) if rotated else (width, height)))
+        placements[i] = (bin_index, x, y, rotated)
+    
+    return placements
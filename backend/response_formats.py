@@ -0,0 +1,81 @@
+import json
+from typing import Any, Dict, Iterator
+from models import NestingRequest, NestingResponse
+
+try:
+    import msgpack
+except ImportError:  # Dependencia opcional
+    msgpack = None
+
+# Formatos de respuesta soportados por /nest
+RESPONSE_FORMATS = ("full", "compact", "msgpack", "ndjson")
+
+# Cómo reconstruir la geometría de una colocación a partir de la pieza:
+# rotar alrededor del centroide, llevar la esquina inferior izquierda al
+# origen y trasladar por (x, y).
+TRANSFORM = "rotate_centroid_normalize_translate"
+
+def to_compact(request: NestingRequest, response: NestingResponse) -> Dict[str, Any]:
+    """Respuesta compacta: cada geometría una sola vez y solo transformaciones por instancia"""
+    parts = {}
+    for piece in request.pieces:
+        if piece.id in parts:
+            continue
+        min_x = min(p.x for p in piece.points)
+        min_y = min(p.y for p in piece.points)
+        parts[piece.id] = [[p.x - min_x, p.y - min_y] for p in piece.points]
+    
+    placements = [
+        [piece.id, piece.bin_id, piece.x, piece.y, piece.rotation]
+        for piece in response.placed_pieces
+    ]
+    
+    bins = {
+        str(bin_id): {
+            'pieces_count': info['pieces_count'],
+            'utilization': info['utilization'],
+            'total_area': info['total_area']
+        }
+        for bin_id, info in (response.bins_data or {}).items()
+    }
+    
+    compact = {
+        'format': "compact",
+        'transform': TRANSFORM,
+        'bin_width': request.bin_width,
+        'bin_height': request.bin_height,
+        'parts': parts,
+        'placement_fields': ["id", "bin_id", "x", "y", "rotation"],
+        'placements': placements,
+        'bins': bins,
+        'bins_used': response.bins_used,
+        'utilization': response.utilization,
+        'computation_time': response.computation_time,
+        'unplaced_pieces': response.unplaced_pieces,
+        'stop_reason': response.stop_reason,
+        'cache_hit': response.cache_hit
+    }
+    if response.profile is not None:
+        compact['profile'] = response.profile
+    return compact
+
+def to_msgpack(compact: Dict[str, Any]) -> bytes:
+    """Serializa la respuesta compacta con MessagePack"""
+    if msgpack is None:
+        raise RuntimeError("El formato msgpack requiere el paquete 'msgpack'")
+    return msgpack.packb(compact, use_bin_type=True)
+
+def iter_ndjson(compact: Dict[str, Any]) -> Iterator[bytes]:
+    """Serializa la respuesta compacta como NDJSON: resumen, piezas y colocaciones"""
+    summary = {key: value for key, value in compact.items() if key not in ("parts", "placements")}
+    summary['type'] = "summary"
+    yield (json.dumps(summary) + "\n").encode()
+    
+    for part_id, points in compact['parts'].items():
+        yield (json.dumps({'type': "part", 'id': part_id, 'points': points}) + "\n").encode()
+    
+    fields = compact['placement_fields']
+    for placement in compact['placements']:
+        line = dict(zip(fields, placement))
+        line['type'] = "placement"
+        yield (json.dumps(line) + "\n").encode()
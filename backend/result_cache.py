@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
+from models import NestingRequest, NestingResponse
+
+# Campos que no cambian el resultado y no forman parte de la clave
+IGNORED_FIELDS = {"pieces", "workers", "use_cache", "profile"}
+
+def _canonical_geometry(points, tolerance: float) -> str:
+    """Hash de la geometría de una pieza, independiente de traslación,
+    vértice inicial y sentido de recorrido"""
+    coords = np.array([(p.x, p.y) for p in points], dtype=float)
+    if len(coords) > 1 and np.allclose(coords[0], coords[-1]):
+        coords = coords[:-1]
+    coords = np.round((coords - coords.min(axis=0)) / tolerance).astype(np.int64)
+    
+    # Sentido antihorario
+    x, y = coords[:, 0], coords[:, 1]
+    if np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y) < 0:
+        coords = coords[::-1]
+    
+    # Empezar por el vértice lexicográficamente menor
+    start = min(range(len(coords)), key=lambda i: (coords[i, 0], coords[i, 1]))
+    coords = np.roll(coords, -start, axis=0)
+    return hashlib.sha1(coords.tobytes()).hexdigest()
+
+def canonical_request_key(request: NestingRequest, tolerance: float = 1e-6) -> Tuple[str, Dict[str, str]]:
+    """Clave canónica de una solicitud.
+
+    Retorna la clave y el mapeo hash de geometría -> id de pieza, usado para
+    reasignar ids cuando la misma geometría llega con otro nombre.
+    """
+    geometry_ids = {}
+    entries = []
+    use_ids = False
+    for piece in request.pieces:
+        geometry = _canonical_geometry(piece.points, tolerance)
+        if geometry in geometry_ids and geometry_ids[geometry] != piece.id:
+            # Geometría repetida con ids distintos: los ids pasan a la clave
+            use_ids = True
+        geometry_ids.setdefault(geometry, piece.id)
+        entries.append((geometry, piece.quantity, piece.id))
+    
+    if use_ids:
+        pieces_key = sorted(entries)
+    else:
+        # Sumar cantidades de piezas con la misma geometría
+        quantities = {}
+        for geometry, quantity, _ in entries:
+            quantities[geometry] = quantities.get(geometry, 0) + quantity
+        pieces_key = sorted(quantities.items())
+    
+    params = {}
+    for name, value in request.model_dump(exclude=IGNORED_FIELDS).items():
+        params[name] = round(value / tolerance) * tolerance if isinstance(value, float) else value
+    
+    payload = json.dumps({'pieces': pieces_key, 'params': params, 'ids': use_ids}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest(), geometry_ids
+
+class ResultCache:
+    """Cache LRU con TTL de respuestas completas de nesting.
+
+    Opcionalmente persiste en SQLite para sobrevivir reinicios.
+    """
+    
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = 3600.0,
+                 max_bytes: int = 256 * 1024 * 1024, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # clave -> (instante, json, mapeo de ids)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, created REAL, payload TEXT, ids TEXT)"
+            )
+            self.db.commit()
+    
+    def get(self, request: NestingRequest) -> Optional[NestingResponse]:
+        """Retorna la respuesta almacenada para una solicitud equivalente"""
+        key, geometry_ids = canonical_request_key(request)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None and self.db is not None:
+                row = self.db.execute(
+                    "SELECT created, payload, ids FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1], json.loads(row[2]))
+                    self._store(key, entry)
+            
+            if entry is not None and self._expired(entry[0]):
+                self._remove(key)
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self.entries.move_to_end(key)
+            self.hits += 1
+        
+        created, payload, cached_ids = entry
+        response = NestingResponse.model_validate_json(payload)
+        return self._remap_ids(response, cached_ids, geometry_ids)
+    
+    def put(self, request: NestingRequest, response: NestingResponse):
+        """Almacena la respuesta de una solicitud"""
+        key, geometry_ids = canonical_request_key(request)
+        entry = (time.time(), response.model_dump_json(), geometry_ids)
+        with self.lock:
+            self._store(key, entry)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO results (key, created, payload, ids) VALUES (?, ?, ?, ?)",
+                    (key, entry[0], entry[1], json.dumps(geometry_ids))
+                )
+                self.db.commit()
+    
+    def clear(self):
+        """Vacía el cache en memoria y reinicia los contadores"""
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+            self.hits = self.misses = self.evictions = 0
+    
+    def stats(self) -> dict:
+        """Contadores de uso del cache"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.current_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'persistent': self.db is not None
+            }
+    
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+    
+    def _store(self, key: str, entry):
+        self._remove(key)
+        self.entries[key] = entry
+        self.current_bytes += len(entry[1])
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or
+                                         self.current_bytes > self.max_bytes):
+            evicted_key = next(iter(self.entries))
+            self._remove(evicted_key)
+            self.evictions += 1
+    
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= len(entry[1])
+    
+    @staticmethod
+    def _remap_ids(response: NestingResponse, cached_ids: Dict[str, str],
+                   geometry_ids: Dict[str, str]) -> NestingResponse:
+        """Traduce los ids de pieza del resultado almacenado a los de la solicitud"""
+        id_map = {cached_ids[g]: geometry_ids[g] for g in geometry_ids if g in cached_ids}
+        if all(old == new for old, new in id_map.items()):
+            return response
+        
+        for piece in response.placed_pieces:
+            piece.id = id_map.get(piece.id, piece.id)
+        for bin_info in (response.bins_data or {}).values():
+            for piece in bin_info.get('placed_pieces', []):
+                if isinstance(piece, dict):
+                    piece['id'] = id_map.get(piece['id'], piece['id'])
+        response.unplaced_pieces = [id_map.get(i, i) for i in response.unplaced_pieces]
+        return response
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    """Retorna el cache de resultados del proceso, configurado por variables de entorno"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            ttl = float(os.environ.get("RESULT_CACHE_TTL_S", 3600))
+            _shared_cache = ResultCache(
+                max_entries=int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 256)),
+                ttl=ttl if ttl > 0 else None,
+                max_bytes=int(float(os.environ.get("RESULT_CACHE_MAX_MB", 256)) * 1024 * 1024),
+                path=os.environ.get("RESULT_CACHE_PATH") or None
+            )
+        return _shared_cache
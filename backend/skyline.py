@@ -0,0 +1,226 @@
+import math
+from collections import OrderedDict
+from typing import List, Tuple
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+# Tolerancia para alinear bordes de piezas con las columnas
+SKYLINE_TOLERANCE = 1e-9
+
+# Huecos que recuerda cada envolvente; al pasarse se descartan los de menor área
+MAX_SKYLINE_HOLES = 64
+
+def column_profile(polygon: Polygon, step: float) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Perfil de un polígono en columnas de ancho ``step``.
+    
+    Retorna (primera columna, y mínima, y máxima) de la pieza dentro de cada
+    columna que cubre; las columnas sin material quedan en NaN.
+    """
+    minx, miny, maxx, maxy = polygon.bounds
+    first = math.floor(minx / step + SKYLINE_TOLERANCE)
+    last = max(math.ceil(maxx / step - SKYLINE_TOLERANCE), first + 1)
+    xs = np.arange(first, last) * step
+    strips = shapely.box(xs, miny - 1.0, xs + step, maxy + 1.0)
+    bounds = shapely.bounds(shapely.intersection(polygon, strips))
+    return first, bounds[:, 1], bounds[:, 3]
+
+class ProfileCache:
+    """Perfiles inferiores de piezas normalizadas, por identidad y paso"""
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+    
+    def get(self, polygon: Polygon, step: float) -> np.ndarray:
+        key = (id(polygon), step)
+        cached = self.entries.get(key)
+        if cached is not None and cached[0] is polygon:
+            return cached[1]
+        first, bottom, _ = column_profile(polygon, step)
+        # La pieza está normalizada al origen: la primera columna es la 0
+        bottom = bottom - polygon.bounds[1]
+        if first > 0:
+            bottom = np.concatenate([np.full(first, np.nan), bottom])
+        # Guarda el polígono para que su id no se reutilice
+        self.entries[key] = (polygon, bottom)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return bottom
+
+_profile_cache = ProfileCache()
+
+class Skyline:
+    """Envolvente superior de las piezas colocadas en un bin, por columnas.
+    
+    ``heights[i]`` acota por arriba todo el material colocado en la columna
+    ``[i * step, (i + 1) * step]``. Dejar caer una pieza sobre la envolvente
+    da siempre una posición sin solapes; los huecos que quedan debajo de
+    una pieza se recuerdan como candidatos aparte. Una pieza que llega al
+    piso de un hueco lo recorta, y se guardan a lo sumo ``max_holes``.
+    """
+    
+    def __init__(self, bin_width: float, step: float, max_holes: int = MAX_SKYLINE_HOLES):
+        self.step = step
+        self.max_holes = max_holes
+        self.heights = np.zeros(max(math.ceil(bin_width / step - SKYLINE_TOLERANCE), 1))
+        # (x inicial, x final, y, techo); el techo acota por arriba la altura libre
+        self.holes: List[Tuple[float, float, float, float]] = []
+    
+    @classmethod
+    def from_polygons(cls, polygons: List[Polygon], bin_width: float, step: float) -> "Skyline":
+        skyline = cls(bin_width, step)
+        for polygon in polygons:
+            skyline.insert(polygon)
+        return skyline
+    
+    def insert(self, polygon: Polygon):
+        """Actualiza la envolvente con una pieza colocada"""
+        first, bottom, top = column_profile(polygon, self.step)
+        start, stop = max(first, 0), min(first + len(top), len(self.heights))
+        if start >= stop:
+            return
+        bottom = bottom[start - first:stop - first]
+        top = top[start - first:stop - first]
+        current = self.heights[start:stop]
+        if self.holes:
+            self._cover_holes(start, bottom)
+        
+        # Las columnas donde la pieza queda por encima de la envolvente dejan un hueco
+        gap = np.nan_to_num(bottom, nan=-np.inf) > current + SKYLINE_TOLERANCE
+        if gap.any():
+            edges = np.flatnonzero(np.diff(np.concatenate([[0], gap.astype(np.int8), [0]])))
+            for run_start, run_stop in zip(edges[::2], edges[1::2]):
+                self.holes.append(((start + run_start) * self.step,
+                                   (start + run_stop) * self.step,
+                                   float(current[run_start:run_stop].min()),
+                                   float(bottom[run_start:run_stop].max())))
+        if len(self.holes) > self.max_holes:
+            self.holes.sort(key=lambda hole: (hole[0] - hole[1]) * (hole[3] - hole[2]))
+            del self.holes[self.max_holes:]
+        
+        self.heights[start:stop] = np.fmax(current, top)
+    
+    def _cover_holes(self, start: int, bottom: np.ndarray):
+        """Recorta los huecos en las columnas donde la pieza baja hasta su piso.
+        
+        ``bottom`` es la y mínima de la pieza en las columnas desde ``start``;
+        lo que queda libre de cada hueco se conserva en tramos contiguos.
+        """
+        stop = start + len(bottom)
+        holes = []
+        for hole in self.holes:
+            hole_start, hole_stop, y, ceiling = hole
+            first = round(hole_start / self.step)
+            last = round(hole_stop / self.step)
+            low, high = max(first, start), min(last, stop)
+            if low >= high:
+                holes.append(hole)
+                continue
+            covered = np.nan_to_num(bottom[low - start:high - start], nan=np.inf) <= y + SKYLINE_TOLERANCE
+            if not covered.any():
+                holes.append(hole)
+                continue
+            free = np.ones(last - first, dtype=np.int8)
+            free[low - first:high - first] = ~covered
+            edges = np.flatnonzero(np.diff(np.concatenate([[0], free, [0]])))
+            for run_start, run_stop in zip(edges[::2], edges[1::2]):
+                holes.append(((first + run_start) * self.step, (first + run_stop) * self.step, y, ceiling))
+        self.holes = holes
+    
+    def drop_positions(self, bottom: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Posición más baja sin solape de una pieza en cada columna inicial.
+        
+        ``bottom`` es el perfil inferior de la pieza normalizada. Retorna
+        (xs, ys) para todas las columnas donde la pieza entra a lo ancho.
+        """
+        width = len(bottom)
+        if width > len(self.heights):
+            return np.empty(0), np.empty(0)
+        windows = np.lib.stride_tricks.sliding_window_view(self.heights, width)
+        material = ~np.isnan(bottom)
+        ys = (windows[:, material] - bottom[material]).max(axis=1)
+        xs = np.arange(len(ys)) * self.step
+        return xs, np.maximum(ys, 0.0)
+    
+    def drop_metrics(self, bottom: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Como ``drop_positions``, con el contacto y el área perdida de cada caída.
+        
+        Retorna (xs, ys, contacto, desperdicio): el largo de columnas donde la
+        pieza apoya sobre la envolvente y el área que queda entre ambas.
+        """
+        xs, ys = self.drop_positions(bottom)
+        if not len(xs):
+            return xs, ys, np.empty(0), np.empty(0)
+        windows = np.lib.stride_tricks.sliding_window_view(self.heights, len(bottom))
+        material = ~np.isnan(bottom)
+        gaps = (ys[:, None] + bottom[material]) - windows[:, material]
+        contact = (gaps <= self.step * 1e-6).sum(axis=1) * self.step
+        waste = np.clip(gaps, 0.0, None).sum(axis=1) * self.step
+        return xs, ys, contact, waste
+    
+    def copy(self) -> "Skyline":
+        clone = object.__new__(Skyline)
+        clone.step = self.step
+        clone.max_holes = self.max_holes
+        clone.heights = self.heights.copy()
+        clone.holes = list(self.holes)
+        return clone
+
+class SkylineDomain:
+    """Posiciones de una pieza de ``width`` × ``height`` cerca de la envolvente.
+    
+    Son las posiciones con y hasta ``max_y`` cuya caja queda entera por
+    encima de ``heights - height`` (incluye todas las caídas sobre la
+    envolvente y los encastres de hasta una altura de pieza) o dentro de un
+    hueco donde la pieza entra. Una pieza colocada cuya caja no toca esa
+    región no puede solaparse con la pieza en ninguna de esas posiciones.
+    """
+    
+    def __init__(self, skyline: Skyline, width: float, height: float, max_y: float = np.inf,
+                 tolerance: float = SKYLINE_TOLERANCE):
+        self.step = skyline.step
+        self.width = width
+        self.height = height
+        self.max_y = max_y
+        self.tolerance = tolerance
+        self.floor = skyline.heights - height  # y mínima de la caja en cada columna
+        holes = np.asarray(skyline.holes, dtype=float).reshape(-1, 4)
+        fits = ((holes[:, 1] - holes[:, 0] + tolerance >= width) &
+                (holes[:, 3] - holes[:, 2] + tolerance >= height) &
+                (holes[:, 2] <= max_y + tolerance))
+        self.holes = holes[fits]
+    
+    def _columns(self, x0: np.ndarray, x1: np.ndarray) -> np.ndarray:
+        """Índices intercalados (primera, última + 1) de las columnas de cada tramo"""
+        count = len(self.floor)
+        first = np.clip(np.floor(x0 / self.step + SKYLINE_TOLERANCE).astype(int), 0, count - 1)
+        last = np.clip(np.ceil(x1 / self.step - SKYLINE_TOLERANCE).astype(int), first + 1, count)
+        return np.column_stack([first, last]).ravel()
+    
+    def reaches(self, bounds: np.ndarray) -> np.ndarray:
+        """Indica qué cajas (minx, miny, maxx, maxy) tocan la región de búsqueda"""
+        if not len(bounds):
+            return np.zeros(0, dtype=bool)
+        floor = np.append(self.floor, np.inf)
+        lowest = np.minimum.reduceat(floor, self._columns(bounds[:, 0], bounds[:, 2]))[::2]
+        tol = self.tolerance
+        result = (bounds[:, 3] >= lowest - tol) & (lowest <= self.max_y + tol)
+        for x0, x1, y, ceiling in self.holes:
+            result |= ((bounds[:, 0] < x1 + tol) & (bounds[:, 2] > x0 - tol) &
+                       (bounds[:, 1] < ceiling + tol) & (bounds[:, 3] > y - tol))
+        # La caja de la pieza no sube de max_y + height
+        return result & (bounds[:, 1] <= self.max_y + self.height + tol)
+    
+    def contains(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Indica qué orígenes (x, y) de la pieza están en la región de búsqueda"""
+        if not len(xs):
+            return np.zeros(0, dtype=bool)
+        floor = np.append(self.floor, -np.inf)
+        highest = np.maximum.reduceat(floor, self._columns(xs, xs + self.width))[::2]
+        tol = self.tolerance
+        result = ys >= highest - tol
+        for x0, x1, y, ceiling in self.holes:
+            result |= ((xs >= x0 - tol) & (xs + self.width <= x1 + tol) &
+                       (ys >= y - tol) & (ys + self.height <= ceiling + tol))
+        return result & (ys <= self.max_y + tol)
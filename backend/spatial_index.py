@@ -0,0 +1,128 @@
+import math
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+from shapely.prepared import prep
+from skyline import Skyline
+
+class PlacedPiecesIndex:
+    """Índice espacial incremental de las piezas colocadas en un bin.
+    
+    Usa un hash de grilla uniforme: cada pieza se registra en las celdas que
+    cubre su bounding box. Las consultas descartan por bounding box y solo
+    evalúan predicados exactos (con geometrías preparadas) sobre los vecinos.
+    """
+    
+    def __init__(self, cell_size: float):
+        self.cell_size = max(cell_size, 1e-9)
+        self.polygons = []
+        self.prepared = []
+        self.bounds = []
+        self.cells = {}  # (i, j) -> índices de piezas
+        self.max_y = 0.0
+        self.area = 0.0  # Área total ocupada
+        self.skylines = {}  # paso -> Skyline, se crean a pedido
+    
+    @classmethod
+    def from_polygons(cls, polygons: List[Polygon], cell_size: Optional[float] = None) -> "PlacedPiecesIndex":
+        """Construye un índice a partir de una lista de polígonos"""
+        if cell_size is None:
+            sizes = [max(p.bounds[2] - p.bounds[0], p.bounds[3] - p.bounds[1]) for p in polygons]
+            cell_size = max(sizes) if sizes else 1.0
+        index = cls(cell_size)
+        for polygon in polygons:
+            index.insert(polygon)
+        return index
+    
+    def __len__(self) -> int:
+        return len(self.polygons)
+    
+    def __iter__(self) -> Iterator[Polygon]:
+        return iter(self.polygons)
+    
+    def insert(self, polygon: Polygon):
+        """Agrega una pieza colocada al índice"""
+        idx = len(self.polygons)
+        bounds = polygon.bounds
+        self.polygons.append(polygon)
+        self.prepared.append(prep(polygon))
+        self.bounds.append(bounds)
+        for cell in self._cells_for(bounds):
+            self.cells.setdefault(cell, []).append(idx)
+        self.max_y = max(self.max_y, bounds[3])
+        self.area += polygon.area
+        for skyline in self.skylines.values():
+            skyline.insert(polygon)
+    
+    def remove(self, idx: int):
+        """Quita la pieza ``idx`` de las consultas (los índices no se reutilizan).
+        
+        Los skylines se descartan y ``max_y`` queda como cota superior.
+        """
+        for cell in self._cells_for(self.bounds[idx]):
+            items = self.cells.get(cell)
+            if items is not None and idx in items:
+                items.remove(idx)
+        self.area -= self.polygons[idx].area
+        self.skylines = {}
+    
+    def query(self, bounds: Tuple[float, float, float, float]) -> List[int]:
+        """Índices de piezas cuya bounding box intersecta ``bounds``"""
+        minx, miny, maxx, maxy = bounds
+        found = set()
+        result = []
+        for cell in self._cells_for(bounds):
+            for idx in self.cells.get(cell, ()):
+                if idx in found:
+                    continue
+                found.add(idx)
+                b = self.bounds[idx]
+                if b[0] <= maxx and b[2] >= minx and b[1] <= maxy and b[3] >= miny:
+                    result.append(idx)
+        return result
+    
+    def skyline(self, bin_width: float, step: float) -> Skyline:
+        """Envolvente superior del bin en columnas de ancho ``step``"""
+        skyline = self.skylines.get(step)
+        if skyline is None:
+            skyline = Skyline.from_polygons(self.polygons, bin_width, step)
+            self.skylines[step] = skyline
+        return skyline
+    
+    def collides(self, polygon: Polygon) -> bool:
+        """Verifica si el interior de la pieza se solapa con alguna colocada.
+        
+        El contacto en el borde no cuenta como colisión.
+        """
+        for idx in self.query(polygon.bounds):
+            prepared = self.prepared[idx]
+            if prepared.intersects(polygon) and not prepared.touches(polygon):
+                return True
+        return False
+    
+    def collides_at(self, piece: Polygon, x: float, y: float) -> bool:
+        """Verifica si la pieza trasladada a (x, y) se solapa con alguna colocada"""
+        # shapely.transform evita armar la matriz afín de translate en cada consulta
+        offset = np.array([x, y])
+        return self.collides(shapely.transform(piece, lambda coords: coords + offset))
+    
+    def copy(self) -> "PlacedPiecesIndex":
+        """Copia del índice que puede seguir creciendo de forma independiente"""
+        clone = object.__new__(type(self))
+        clone.cell_size = self.cell_size
+        clone.polygons = list(self.polygons)
+        clone.prepared = list(self.prepared)
+        clone.bounds = list(self.bounds)
+        clone.cells = {cell: list(items) for cell, items in self.cells.items()}
+        clone.max_y = self.max_y
+        clone.area = self.area
+        clone.skylines = {step: skyline.copy() for step, skyline in self.skylines.items()}
+        return clone
+    
+    def _cells_for(self, bounds: Tuple[float, float, float, float]):
+        minx, miny, maxx, maxy = bounds
+        size = self.cell_size
+        for i in range(math.floor(minx / size), math.floor(maxx / size) + 1):
+            for j in range(math.floor(miny / size), math.floor(maxy / size) + 1):
+                yield (i, j)
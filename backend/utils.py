@@ -1,9 +1,94 @@
 import numpy as np
+import shapely
 from shapely.geometry import Polygon, Point
 from shapely.affinity import translate, rotate
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 import math
 
+class PolygonBatch:
+    """Conjunto de polígonos en arreglos contiguos de NumPy.
+
+    ``coords`` es un arreglo (total_vértices, 2) de float64 con los vértices
+    de todos los polígonos seguidos (sin repetir el primero al final) y
+    ``offsets`` (N + 1) marca dónde empieza cada uno, para admitir
+    cantidades de vértices distintas.
+    """
+    
+    def __init__(self, coords: np.ndarray, offsets: np.ndarray):
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    @classmethod
+    def from_coords(cls, polygons: List) -> "PolygonBatch":
+        """Construye el batch desde listas de (x, y) o arreglos (V, 2)"""
+        arrays = [np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in polygons]
+        counts = np.array([len(a) for a in arrays], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        coords = np.concatenate(arrays) if arrays else np.empty((0, 2))
+        return cls(coords, offsets)
+    
+    @classmethod
+    def from_pieces(cls, pieces) -> "PolygonBatch":
+        """Construye el batch desde PieceData (o cualquier objeto con ``points``)"""
+        counts = np.fromiter((len(piece.points) for piece in pieces), dtype=np.int64, count=len(pieces))
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        flat = np.fromiter(
+            (value for piece in pieces for p in piece.points for value in (p.x, p.y)),
+            dtype=np.float64, count=int(offsets[-1]) * 2
+        )
+        return cls(flat.reshape(-1, 2), offsets)
+    
+    @classmethod
+    def from_shapely(cls, polygons: List[Polygon]) -> "PolygonBatch":
+        """Construye el batch desde polígonos de Shapely (solo el exterior)"""
+        rings = shapely.get_exterior_ring(np.asarray(polygons, dtype=object))
+        coords, ring_index = shapely.get_coordinates(rings, return_index=True)
+        counts = np.bincount(ring_index, minlength=len(polygons)) - 1  # Sin el punto de cierre
+        keep = np.ones(len(coords), dtype=bool)
+        keep[np.cumsum(counts + 1) - 1] = False
+        return cls(coords[keep], np.concatenate(([0], np.cumsum(counts))))
+    
+    @property
+    def counts(self) -> np.ndarray:
+        """Cantidad de vértices de cada polígono"""
+        return np.diff(self.offsets)
+    
+    def polygon_ids(self) -> np.ndarray:
+        """Índice del polígono al que pertenece cada vértice"""
+        return np.repeat(np.arange(len(self)), self.counts)
+    
+    def next_vertex(self) -> np.ndarray:
+        """Índice del vértice siguiente de cada vértice (cerrando cada anillo)"""
+        nxt = np.arange(1, len(self.coords) + 1)
+        nxt[self.offsets[1:] - 1] = self.offsets[:-1]
+        return nxt
+    
+    def polygon(self, i: int) -> np.ndarray:
+        """Vértices del polígono i como arreglo (V, 2)"""
+        return self.coords[self.offsets[i]:self.offsets[i + 1]]
+    
+    def padded(self, fill: float = np.nan) -> Tuple[np.ndarray, np.ndarray]:
+        """Arreglo (N, V_max, 2) relleno con ``fill`` y la máscara de vértices válidos"""
+        counts = self.counts
+        max_vertices = int(counts.max()) if len(counts) else 0
+        result = np.full((len(self), max_vertices, 2), fill, dtype=np.float64)
+        mask = np.arange(max_vertices)[None, :] < counts[:, None]
+        result[mask] = self.coords
+        return result, mask
+    
+    def to_shapely(self) -> np.ndarray:
+        """Convierte el batch en un arreglo de polígonos de Shapely"""
+        closing = self.coords[self.offsets[:-1]]
+        counts = self.counts
+        positions = self.offsets[1:]
+        coords = np.insert(self.coords, positions, closing, axis=0)
+        ring_index = np.repeat(np.arange(len(self)), counts + 1)
+        rings = shapely.linearrings(coords, indices=ring_index)
+        return shapely.polygons(rings)
+
 class GeometryUtils:
     """Utilidades geométricas para el nesting"""
     
@@ -131,6 +216,93 @@ class GeometryUtils:
         min_x, min_y, _, _ = GeometryUtils.get_bounding_box(polygon)
         return [(p[0] - min_x, p[1] - min_y) for p in polygon]
 
+    @staticmethod
+    def batch_polygon_area(batch: PolygonBatch, signed: bool = False) -> np.ndarray:
+        """Áreas (shoelace) de todos los polígonos del batch"""
+        x, y = batch.coords[:, 0], batch.coords[:, 1]
+        nxt = batch.next_vertex()
+        cross = x * y[nxt] - x[nxt] * y
+        area = np.add.reduceat(cross, batch.offsets[:-1]) / 2.0 if len(batch) else np.empty(0)
+        return area if signed else np.abs(area)
+    
+    @staticmethod
+    def batch_polygon_centroid(batch: PolygonBatch) -> np.ndarray:
+        """Centroides de área (como Shapely) de todos los polígonos, (N, 2).
+
+        A diferencia de ``polygon_centroid`` (promedio de vértices), pondera
+        por área; si el área es nula se usa el promedio de vértices.
+        """
+        if not len(batch):
+            return np.empty((0, 2))
+        x, y = batch.coords[:, 0], batch.coords[:, 1]
+        nxt = batch.next_vertex()
+        cross = x * y[nxt] - x[nxt] * y
+        starts = batch.offsets[:-1]
+        area = np.add.reduceat(cross, starts) / 2.0
+        cx = np.add.reduceat((x + x[nxt]) * cross, starts)
+        cy = np.add.reduceat((y + y[nxt]) * cross, starts)
+        
+        mean = np.add.reduceat(batch.coords, starts, axis=0) / batch.counts[:, None]
+        degenerate = np.isclose(area, 0.0)
+        safe_area = np.where(degenerate, 1.0, area)
+        centroid = np.column_stack((cx / (6.0 * safe_area), cy / (6.0 * safe_area)))
+        centroid[degenerate] = mean[degenerate]
+        return centroid
+    
+    @staticmethod
+    def batch_bounding_boxes(batch: PolygonBatch) -> np.ndarray:
+        """Bounding boxes (min_x, min_y, max_x, max_y) de todos los polígonos, (N, 4)"""
+        if not len(batch):
+            return np.empty((0, 4))
+        starts = batch.offsets[:-1]
+        mins = np.minimum.reduceat(batch.coords, starts, axis=0)
+        maxs = np.maximum.reduceat(batch.coords, starts, axis=0)
+        return np.hstack((mins, maxs))
+    
+    @staticmethod
+    def batch_rotate(batch: PolygonBatch, angles, centers: Optional[np.ndarray] = None) -> PolygonBatch:
+        """Rota cada polígono por su ángulo (grados) alrededor de su centro.
+
+        ``angles`` puede ser un escalar o un arreglo (N,); ``centers`` es un
+        arreglo (N, 2) y por defecto se usa el centroide de área.
+        """
+        if centers is None:
+            centers = GeometryUtils.batch_polygon_centroid(batch)
+        angles = np.broadcast_to(np.radians(np.asarray(angles, dtype=np.float64)), (len(batch),))
+        ids = batch.polygon_ids()
+        cos_a = np.cos(angles)[ids]
+        sin_a = np.sin(angles)[ids]
+        rel = batch.coords - centers[ids]
+        rotated = np.column_stack((
+            rel[:, 0] * cos_a - rel[:, 1] * sin_a,
+            rel[:, 0] * sin_a + rel[:, 1] * cos_a
+        )) + centers[ids]
+        return PolygonBatch(rotated, batch.offsets.copy())
+    
+    @staticmethod
+    def batch_normalize_to_origin(batch: PolygonBatch) -> PolygonBatch:
+        """Mueve cada polígono para que su esquina inferior izquierda esté en el origen"""
+        boxes = GeometryUtils.batch_bounding_boxes(batch)
+        coords = batch.coords - boxes[batch.polygon_ids(), :2]
+        return PolygonBatch(coords, batch.offsets.copy())
+    
+    @staticmethod
+    def batch_point_in_polygon(points: np.ndarray, polygon) -> np.ndarray:
+        """Ray casting vectorizado: qué puntos (M, 2) están dentro del polígono"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        poly = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+        p1 = poly
+        p2 = np.roll(poly, -1, axis=0)
+        px = points[:, 0][:, None]
+        py = points[:, 1][:, None]
+        
+        crosses = (p1[:, 1] > py) != (p2[:, 1] > py)
+        dy = p2[:, 1] - p1[:, 1]
+        safe_dy = np.where(dy == 0, 1.0, dy)
+        x_inters = (py - p1[:, 1]) * (p2[:, 0] - p1[:, 0]) / safe_dy + p1[:, 0]
+        hits = crosses & (px < x_inters)
+        return (np.count_nonzero(hits, axis=1) % 2) == 1
+
 class NestingOptimizer:
     """Optimizaciones adicionales para el nesting"""
     
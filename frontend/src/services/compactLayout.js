@@ -0,0 +1,91 @@
+// src/services/compactLayout.js
+
+// Centroide de área de un polígono (igual que Shapely)
+function polygonCentroid(points) {
+  let area = 0;
+  let cx = 0;
+  let cy = 0;
+  for (let i = 0; i < points.length; i++) {
+    const [x1, y1] = points[i];
+    const [x2, y2] = points[(i + 1) % points.length];
+    const cross = x1 * y2 - x2 * y1;
+    area += cross;
+    cx += (x1 + x2) * cross;
+    cy += (y1 + y2) * cross;
+  }
+  if (area === 0) {
+    const n = points.length;
+    return [
+      points.reduce((sum, p) => sum + p[0], 0) / n,
+      points.reduce((sum, p) => sum + p[1], 0) / n,
+    ];
+  }
+  return [cx / (3 * area), cy / (3 * area)];
+}
+
+// Aplica la transformación "rotate_centroid_normalize_translate" del backend
+function transformPart(points, x, y, rotation) {
+  const [cx, cy] = polygonCentroid(points);
+  const angle = (rotation * Math.PI) / 180;
+  const cos = Math.cos(angle);
+  const sin = Math.sin(angle);
+
+  const rotated = points.map(([px, py]) => [
+    cx + (px - cx) * cos - (py - cy) * sin,
+    cy + (px - cx) * sin + (py - cy) * cos,
+  ]);
+  const minX = Math.min(...rotated.map((p) => p[0]));
+  const minY = Math.min(...rotated.map((p) => p[1]));
+
+  return rotated.map(([px, py]) => ({ x: px - minX + x, y: py - minY + y }));
+}
+
+// Reconstruye una respuesta "compact" (o sus líneas NDJSON ya agrupadas)
+// al formato completo que usa la interfaz
+export function rebuildCompactLayout(compact) {
+  const fields = compact.placement_fields;
+  const placedPieces = compact.placements.map((values) => {
+    const placement = Object.fromEntries(fields.map((field, i) => [field, values[i]]));
+    return {
+      ...placement,
+      points: transformPart(compact.parts[placement.id], placement.x, placement.y, placement.rotation),
+    };
+  });
+
+  const binsData = {};
+  for (const [binId, info] of Object.entries(compact.bins)) {
+    binsData[binId] = {
+      ...info,
+      placed_pieces: placedPieces.filter((piece) => String(piece.bin_id) === binId),
+    };
+  }
+
+  return {
+    placed_pieces: placedPieces,
+    bins_used: compact.bins_used,
+    utilization: compact.utilization,
+    computation_time: compact.computation_time,
+    bins_data: binsData,
+    unplaced_pieces: compact.unplaced_pieces,
+    stop_reason: compact.stop_reason,
+    cache_hit: compact.cache_hit,
+  };
+}
+
+// Agrupa las líneas de una respuesta NDJSON en el formato compacto
+export function parseNdjsonLayout(text) {
+  const compact = { parts: {}, placements: [] };
+  for (const line of text.split("\n")) {
+    if (!line.trim()) continue;
+    const record = JSON.parse(line);
+    if (record.type === "summary") {
+      const { type, ...summary } = record;
+      Object.assign(compact, summary);
+    } else if (record.type === "part") {
+      compact.parts[record.id] = record.points;
+    } else if (record.type === "placement") {
+      compact.placements.push(compact.placement_fields.map((field) => record[field]));
+    }
+  }
+  return compact;
+}
@@ -20,4 +20,79 @@ export async function postNestData(data) {
       throw error;
     }
   }
-  
\ No newline at end of file
+  
+// Nesting con streaming (Server-Sent Events): llama a onLayout con cada
+// layout mejor que encuentra el solver y retorna el resultado final.
+export async function streamNestData(data, { onJob, onLayout } = {}) {
+  try {
+    const response = await fetch("http://127.0.0.1:8000/nest/stream", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify(data),
+    });
+
+    if (!response.ok) {
+      throw new Error(`Error ${response.status}: ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      // Los eventos SSE se separan por una línea en blanco
+      let separator;
+      while ((separator = buffer.indexOf("\n\n")) !== -1) {
+        const rawEvent = buffer.slice(0, separator);
+        buffer = buffer.slice(separator + 2);
+
+        let event = "message";
+        let payload = "";
+        for (const line of rawEvent.split("\n")) {
+          if (line.startsWith("event:")) event = line.slice(6).trim();
+          else if (line.startsWith("data:")) payload += line.slice(5).trim();
+        }
+        const parsed = payload ? JSON.parse(payload) : null;
+
+        if (event === "job") {
+          onJob?.(parsed.job_id);
+        } else if (event === "layout") {
+          onLayout?.(parsed.layout, parsed.metrics);
+        } else if (event === "completed") {
+          return parsed;
+        } else {
+          throw new Error(`Nesting ${event}: ${JSON.stringify(parsed)}`);
+        }
+      }
+    }
+
+    throw new Error("El stream terminó sin resultado");
+  } catch (error) {
+    console.error("Error en la solicitud:", error);
+    throw error;
+  }
+}
+
+// Acepta el mejor layout publicado hasta ahora y libera el worker
+export async function acceptNestJob(jobId) {
+  try {
+    const response = await fetch(`http://127.0.0.1:8000/jobs/${jobId}/accept`, {
+      method: "POST",
+    });
+
+    if (!response.ok) {
+      throw new Error(`Error ${response.status}: ${response.statusText}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error("Error en la solicitud:", error);
+    throw error;
+  }
+}